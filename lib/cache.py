@@ -0,0 +1,234 @@
+"""
+Cache Module for SC2FLA-FOSS-Edition
+
+Persistent, content-addressed caches of decoded texture pixels and parsed .sc files.
+Texture entries are keyed by a hash of the compressed texture payload and its format and stored as .npy files,
+parsed files by a hash of their source files and the parser version.
+Both are evicted least recently used first once their size cap is reached.
+"""
+
+import os
+import mmap
+import pickle
+import struct
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+from lib.config import BASE_DIR, get_config
+
+
+DEFAULT_CACHE_DIR = BASE_DIR / ".cache" / "textures"
+DEFAULT_SWF_CACHE_DIR = BASE_DIR / ".cache" / "swf"
+
+# Image modes that round-trip through a plain uint8 array
+CACHED_MODES = ("RGBA", "RGB", "LA", "L")
+
+
+class DiskCache:
+    """Size capped directory of cache entries, one file per entry."""
+
+    SUFFIX = ""
+
+    def __init__(self, directory: Path, max_size: int, enabled: bool = True) -> None:
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.enabled = enabled
+
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+        self._lock = threading.Lock()
+        self._sizes: Optional[dict] = None
+
+    def path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{self.SUFFIX}"
+
+    def write(self, key: str, write) -> None:
+        """Writes an entry through a temporary file with write(file), then evicts old entries."""
+        path = self.path(key)
+        temp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(temp, "wb") as f:
+                write(f)
+            os.replace(temp, path)
+        except OSError:
+            return
+
+        with self._lock:
+            sizes = self._index()
+            sizes[path] = path.stat().st_size
+            self._evict(sizes)
+
+    def hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def clear(self) -> int:
+        """Removes all cached entries, returns the number of removed entries."""
+        with self._lock:
+            sizes = self._index()
+            for path in list(sizes):
+                path.unlink(missing_ok=True)
+            count = len(sizes)
+            sizes.clear()
+        return count
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            return sum(self._index().values())
+
+    def _index(self) -> dict:
+        if self._sizes is None:
+            self._sizes = {path: path.stat().st_size for path in self.directory.glob(f"*/*{self.SUFFIX}")}
+        return self._sizes
+
+    def _evict(self, sizes: dict) -> None:
+        total = sum(sizes.values())
+        if total <= self.max_size:
+            return
+
+        for path in sorted(sizes, key=lambda p: p.stat().st_mtime if p.exists() else 0):
+            if total <= self.max_size:
+                break
+            total -= sizes.pop(path)
+            path.unlink(missing_ok=True)
+            self.evictions += 1
+
+
+class TextureCache(DiskCache):
+    """On-disk cache of decoded textures."""
+
+    SUFFIX = ".npy"
+
+    @staticmethod
+    def key(payload, texture_format: str) -> str:
+        """Content hash of a compressed texture payload and its format."""
+        digest = hashlib.blake2b(payload, digest_size=20)
+        digest.update(texture_format.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Image.Image]:
+        path = self.path(key)
+        try:
+            pixels = np.load(path)
+            os.utime(path)  # LRU order is kept in modification times
+        except (OSError, ValueError):
+            self.miss()
+            return None
+
+        self.hit()
+        return Image.fromarray(pixels)
+
+    def put(self, key: str, image: Image.Image) -> None:
+        if image.mode not in CACHED_MODES:
+            return
+
+        self.write(key, lambda f: np.save(f, np.asarray(image)))
+
+
+class SWFCache(DiskCache):
+    """On-disk cache of parsed .sc files.
+    An entry is a pickled snapshot followed by the texture payloads, which are mapped back without copying."""
+
+    SUFFIX = ".swf"
+    MAGIC = b"SWFC"
+
+    @staticmethod
+    def key(paths: list, version: int) -> str:
+        """Content hash of the source files of a parsed .sc and the parser version."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(version.to_bytes(4, "little"))
+        for path in paths:
+            digest.update(os.path.basename(path).encode())
+            with open(path, "rb") as f:
+                while chunk := f.read(1 << 20):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[tuple]:
+        """The snapshot and a view of the texture payloads, None if there is no usable entry."""
+        path = self.path(key)
+        mapped = None
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+            if mapped[:4] != SWFCache.MAGIC:
+                raise ValueError("Bad cache entry magic")
+
+            state_length, payloads_length = struct.unpack_from("<QQ", mapped, 4)
+            if len(mapped) != 20 + state_length + payloads_length:
+                raise ValueError("Truncated cache entry")
+
+            state = pickle.loads(mapped[20:20 + state_length])
+            os.utime(path)
+        except FileNotFoundError:
+            self.miss()
+            return None
+        except Exception:
+            # Truncated or written by an incompatible version, parsed again and replaced.
+            # The mapping is closed first, a mapped file cannot be removed on Windows
+            if mapped is not None:
+                mapped.close()
+            path.unlink(missing_ok=True)
+            self.miss()
+            return None
+
+        self.hit()
+        return state, memoryview(mapped)[20 + state_length:]
+
+    def put(self, key: str, state, payloads: list) -> None:
+        def write(f):
+            data = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+            f.write(SWFCache.MAGIC)
+            f.write(struct.pack("<QQ", len(data), sum(len(payload) for payload in payloads)))
+            f.write(data)
+            for payload in payloads:
+                f.write(payload)
+
+        self.write(key, write)
+
+
+# Global cache instance (lazy loaded)
+_texture_cache: Optional[TextureCache] = None
+
+
+def get_texture_cache() -> TextureCache:
+    """Get the global texture cache configured in Settings."""
+    global _texture_cache
+    if _texture_cache is None:
+        settings = get_config().settings
+        _texture_cache = TextureCache(
+            settings.texture_cache_dir or DEFAULT_CACHE_DIR,
+            settings.texture_cache_max_mb * 1024 * 1024,
+            settings.texture_cache
+        )
+    return _texture_cache
+
+
+_swf_cache: Optional[SWFCache] = None
+
+
+def get_swf_cache() -> SWFCache:
+    """Get the global parsed .sc cache configured in Settings."""
+    global _swf_cache
+    if _swf_cache is None:
+        settings = get_config().settings
+        _swf_cache = SWFCache(
+            settings.swf_cache_dir or DEFAULT_SWF_CACHE_DIR,
+            settings.swf_cache_max_mb * 1024 * 1024,
+            settings.swf_cache
+        )
+    return _swf_cache
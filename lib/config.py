@@ -48,6 +48,13 @@ class Settings:
     prefer_native: bool = True  # Prefer native binaries over Wine
     verbose: bool = False
     auto_download_tools: bool = False
+    texture_cache: bool = True  # Cache decoded KTX / SCTX textures on disk
+    texture_cache_dir: Optional[str] = None  # Defaults to .cache/textures in the project directory
+    texture_cache_max_mb: int = 2048
+    swf_cache: bool = False  # Cache parsed .sc files on disk, opt-in with --swf-cache
+    swf_cache_dir: Optional[str] = None  # Defaults to .cache/swf in the project directory
+    swf_cache_max_mb: int = 4096
+    export_index: Optional[str] = None  # SQLite export index of --index / --find, defaults to .cache/exports.db
     
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -191,6 +198,8 @@ def print_config_status(config: Optional[Config] = None):
     print(f"  Use Wine: {config.settings.use_wine}")
     print(f"  Prefer Native: {config.settings.prefer_native}")
     print(f"  Verbose: {config.settings.verbose}")
+    print(f"  Texture Cache: {config.settings.texture_cache} ({config.settings.texture_cache_max_mb} MB)")
+    print(f"  SWF Cache: {config.settings.swf_cache} ({config.settings.swf_cache_max_mb} MB)")
     
     print(f"\n{Fore.YELLOW}Tool Paths:{Style.RESET_ALL}")
     for tool_name, tool_path in tools.items():
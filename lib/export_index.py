@@ -0,0 +1,140 @@
+"""
+Export Index Module for SC2FLA-FOSS-Edition
+
+SQLite database of the export names of many .sc files, filled from their headers only.
+Files are re-read only when their modification time changed and their content hash differs.
+"""
+
+import os
+import sqlite3
+import hashlib
+from pathlib import Path
+from typing import Callable, Optional
+
+from lib.config import BASE_DIR, get_config
+
+
+DEFAULT_INDEX_PATH = BASE_DIR / ".cache" / "exports.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    version INTEGER,
+    shapes INTEGER,
+    movieclips INTEGER,
+    textures INTEGER,
+    text_fields INTEGER,
+    matrices INTEGER,
+    color_transforms INTEGER,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS exports (
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    resource_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exports_name ON exports(name);
+CREATE INDEX IF NOT EXISTS exports_file ON exports(file_id);
+"""
+
+COUNT_COLUMNS = ("shapes", "movieclips", "textures", "text_fields", "matrices", "color_transforms")
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExportIndex:
+    """Export names, resource ids and header counts of .sc files in a SQLite database."""
+
+    VERSION = 1
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != ExportIndex.VERSION:
+            # Written by another version, rebuilt from scratch
+            self.connection.executescript("DROP TABLE IF EXISTS exports; DROP TABLE IF EXISTS files;")
+            self.connection.execute(f"PRAGMA user_version = {ExportIndex.VERSION}")
+
+        self.connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def update(self, paths: list, read_info: Callable[[str], dict], root: Optional[str] = None) -> dict:
+        """Indexes new and changed files with read_info, see main.collect_info.
+        Files below root that are indexed but not in paths anymore are removed.
+        Returns the number of indexed, touched, skipped and removed files."""
+        stats = {"indexed": 0, "touched": 0, "skipped": 0, "removed": 0}
+
+        with self.connection:
+            for path in paths:
+                stats[self.update_file(os.path.abspath(path), read_info)] += 1
+
+            if root is not None:
+                root = os.path.join(os.path.abspath(root), "")
+                current = {os.path.abspath(path) for path in paths}
+                for id, path in self.connection.execute("SELECT id, path FROM files").fetchall():
+                    if path.startswith(root) and path not in current:
+                        self.connection.execute("DELETE FROM files WHERE id = ?", (id,))
+                        stats["removed"] += 1
+
+        return stats
+
+    def update_file(self, path: str, read_info: Callable[[str], dict]) -> str:
+        stat = os.stat(path)
+        row = self.connection.execute("SELECT id, size, mtime_ns, hash FROM files WHERE path = ?", (path,)).fetchone()
+
+        digest = None
+        if row is not None:
+            id, size, mtime_ns, known_hash = row
+            if (size, mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                return "skipped"
+
+            # Copied or touched files keep their entry when the content is the same
+            digest = file_hash(path)
+            if digest == known_hash:
+                self.connection.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE id = ?", (stat.st_size, stat.st_mtime_ns, id))
+                return "touched"
+
+            self.connection.execute("DELETE FROM files WHERE id = ?", (id,))
+
+        info = read_info(path)
+        cursor = self.connection.execute(
+            f"INSERT INTO files (path, size, mtime_ns, hash, version, {', '.join(COUNT_COLUMNS)}, error) "
+            f"VALUES (?, ?, ?, ?, ?, {', '.join('?' * len(COUNT_COLUMNS))}, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, digest or file_hash(path), info.get("version"),
+             *(info.get(column) for column in COUNT_COLUMNS), info.get("error")))
+
+        self.connection.executemany("INSERT INTO exports (file_id, name, resource_id) VALUES (?, ?, ?)",
+                                    [(cursor.lastrowid, name, id) for name, id in info.get("exports", {}).items()])
+        return "indexed"
+
+    def find(self, pattern: str) -> list:
+        """Exports with a name matching the glob pattern as (name, resource id, path, version) rows."""
+        return self.connection.execute(
+            "SELECT exports.name, exports.resource_id, files.path, files.version FROM exports "
+            "JOIN files ON files.id = exports.file_id WHERE exports.name GLOB ? ORDER BY files.path, exports.name",
+            (pattern,)).fetchall()
+
+    @property
+    def files_count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+
+def open_export_index() -> ExportIndex:
+    """Open the export index configured in Settings."""
+    return ExportIndex(get_config().settings.export_index or DEFAULT_INDEX_PATH)
@@ -1,3 +1,7 @@
+from abc import ABC, abstractmethod
+
+from lib.console import Console
+
 from .writable import Writable
 import numpy
 
@@ -21,14 +25,12 @@ class Color:
         self.b_mul = b_mul
 
     def load(self, swf, tag):
-        self.r_add = swf.reader.read_uchar()
-        self.g_add = swf.reader.read_uchar()
-        self.b_add = swf.reader.read_uchar()
+        self.r_add, self.g_add, self.b_add, a_mul, r_mul, g_mul, b_mul = swf.reader.read_struct("<7B")
 
-        self.a_mul = swf.reader.read_uchar() / 255
-        self.r_mul = swf.reader.read_uchar() / 255
-        self.g_mul = swf.reader.read_uchar() / 255
-        self.b_mul = swf.reader.read_uchar() / 255
+        self.a_mul = a_mul / 255
+        self.r_mul = r_mul / 255
+        self.g_mul = g_mul / 255
+        self.b_mul = b_mul / 255
 
     def save(self, swf):
         swf.writer.write_uchar(9)
@@ -61,13 +63,15 @@ class Matrix:
     def load(self, swf, tag):
         divider = 1024 if tag == 8 else 65535
 
-        self.a = swf.reader.read_int() / divider  # scale x
-        self.b = swf.reader.read_int() / divider  # rotation x
-        self.c = swf.reader.read_int() / divider  # rotation y
-        self.d = swf.reader.read_int() / divider  # scale y
+        a, b, c, d, tx, ty = swf.reader.read_struct("<6i")
 
-        self.tx = swf.reader.read_twip()  # position x
-        self.ty = swf.reader.read_twip()  # position y
+        self.a = a / divider  # scale x
+        self.b = b / divider  # rotation x
+        self.c = c / divider  # rotation y
+        self.d = d / divider  # scale y
+
+        self.tx = tx / 20  # position x
+        self.ty = ty / 20  # position y
 
     def save(self, swf):
         swf.writer.write_uchar(8)
@@ -89,12 +93,111 @@ class Matrix:
         return False
 
 
+# Raw tag records as they follow each other in the file: tag id, tag length, payload
+MATRIX_RECORD = numpy.dtype([("tag", "u1"), ("length", "<i4"), ("matrix", "<i4", 6)])
+COLOR_RECORD = numpy.dtype([("tag", "u1"), ("length", "<i4"), ("color", "u1", 7)])
+
+
+class TransformArray(ABC):
+    """List-like storage of bank entries as rows of a NumPy array, objects are created on access."""
+
+    DTYPE = None
+    DEFAULT = ()
+
+    def __init__(self, count: int = 0) -> None:
+        self.data = numpy.tile(numpy.array(self.DEFAULT, self.DTYPE), (count, 1))
+        self.count = count
+
+    @property
+    def array(self) -> numpy.ndarray:
+        return self.data[:self.count]
+
+    @abstractmethod
+    def to_object(self, row: list):
+        pass
+
+    @abstractmethod
+    def to_row(self, item) -> list:
+        pass
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.to_object(row) for row in self.array[index].tolist()]
+
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("bank index out of range")
+
+        return self.to_object(self.data[index].tolist())
+
+    def __setitem__(self, index: int, item):
+        self.array[index] = self.to_row(item)
+
+    def __iter__(self):
+        for row in self.array.tolist():
+            yield self.to_object(row)
+
+    def __contains__(self, item) -> bool:
+        return self.find(item) != -1
+
+    def find(self, item) -> int:
+        matches = numpy.flatnonzero((self.array == numpy.array(self.to_row(item), self.DTYPE)).all(axis=1))
+        return int(matches[0]) if matches.size else -1
+
+    def index(self, item) -> int:
+        index = self.find(item)
+        if index == -1:
+            raise ValueError("item is not in bank")
+        return index
+
+    def append(self, item):
+        if self.count == len(self.data):
+            grown = numpy.tile(numpy.array(self.DEFAULT, self.DTYPE), (max(16, self.count * 2), 1))
+            grown[:self.count] = self.array
+            self.data = grown
+
+        self.data[self.count] = self.to_row(item)
+        self.count += 1
+
+
+class MatrixArray(TransformArray):
+    """(N, 6) float array of a, b, c, d, tx, ty."""
+
+    DTYPE = numpy.float64
+    DEFAULT = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+    def to_object(self, row: list) -> Matrix:
+        return Matrix(*row)
+
+    def to_row(self, matrix: Matrix) -> list:
+        return [matrix.a, matrix.b, matrix.c, matrix.d, matrix.tx, matrix.ty]
+
+
+class ColorArray(TransformArray):
+    """(N, 7) byte array of r_add, g_add, b_add, a_mul, r_mul, g_mul, b_mul as stored in the file."""
+
+    DTYPE = numpy.uint8
+    DEFAULT = (0, 0, 0, 255, 255, 255, 255)
+
+    def to_object(self, row: list) -> Color:
+        r_add, g_add, b_add, a_mul, r_mul, g_mul, b_mul = row
+        return Color(r_add, g_add, b_add, a_mul / 255, r_mul / 255, g_mul / 255, b_mul / 255)
+
+    def to_row(self, color: Color) -> list:
+        return [round(color.r_add), round(color.g_add), round(color.b_add),
+                round(color.a_mul * 255), round(color.r_mul * 255), round(color.g_mul * 255), round(color.b_mul * 255)]
+
+
 class MatrixBank(Writable):
     def __init__(self) -> None:
         self.index: int = 0
 
-        self.matrices: list = []
-        self.color_transforms: list = []
+        self.matrices: MatrixArray = MatrixArray()
+        self.color_transforms: ColorArray = ColorArray()
 
         self.matrices_count: int = 0
         self.color_transforms_count: int = 0
@@ -125,23 +228,90 @@ class MatrixBank(Writable):
                             matrix["tx"],
                             matrix["ty"])
 
-        if matrix not in self.matrices:
+        index = self.matrices.find(matrix)
+        if index == -1:
             self.matrices.append(matrix)
+            index = len(self.matrices) - 1
 
-        return self.matrices.index(matrix)
+        return index
 
-    def get_color_transform(self, color_transform: list):
-        if color_transform not in self.color_transforms:
+    def get_color_transform(self, color_transform: Color):
+        index = self.color_transforms.find(color_transform)
+        if index == -1:
             self.color_transforms.append(color_transform)
+            index = len(self.color_transforms) - 1
 
-        return self.color_transforms.index(color_transform)
+        return index
 
     def load(self, swf):
         self.matrices_count = swf.reader.read_ushort()
         self.color_transforms_count = swf.reader.read_ushort()
 
-        self.matrices = [_class() for _class in [Matrix] * self.matrices_count]
-        self.color_transforms= [_class() for _class in [Color] * self.color_transforms_count]
+        self.matrices = MatrixArray(self.matrices_count)
+        self.color_transforms = ColorArray(self.color_transforms_count)
+
+    @staticmethod
+    def read_records(swf, dtype: numpy.dtype, tags: tuple, payload: int, count: int) -> numpy.ndarray:
+        """Reads the current tag and every directly following one of `tags`, up to `count` records.
+        The reader has to stand right after the header of the current tag."""
+        position = swf.reader.tell() - 5
+        count = max(1, min(count, (len(swf.reader.view) - position) // dtype.itemsize))
+
+        records = numpy.frombuffer(swf.reader.view[position:position + count * dtype.itemsize], dtype)
+
+        matching = numpy.isin(records["tag"], tags) & (records["length"] == payload)
+        matching[0] = True  # the current tag is always read
+        run = count if matching.all() else int(matching.argmin())
+
+        swf.reader.seek(position + run * dtype.itemsize)
+        return records[:run]
+
+    def load_matrices(self, swf, start: int) -> int:
+        """Loads the current matrix tag together with all matrix tags following it, returns their count."""
+        if start >= self.matrices_count:
+            Console.error("Trying to load too many Matrices! Aborting...")
+            raise TypeError()
+
+        records = MatrixBank.read_records(swf, MATRIX_RECORD, (8, 36), 24, self.matrices_count - start)
+
+        matrices = records["matrix"].astype(numpy.float64)
+        matrices[:, :4] /= numpy.where(records["tag"] == 8, 1024, 65535)[:, None]  # scale and rotation
+        matrices[:, 4:] /= 20  # position
+
+        self.matrices.data[start:start + len(records)] = matrices
+        return len(records)
+
+    def load_color_transforms(self, swf, start: int) -> int:
+        """Loads the current color transform tag together with all color transform tags following it, returns their count."""
+        if start >= self.color_transforms_count:
+            Console.error("Trying to load too many ColorTransforms! Aborting...")
+            raise TypeError()
+
+        records = MatrixBank.read_records(swf, COLOR_RECORD, (9,), 7, self.color_transforms_count - start)
+
+        self.color_transforms.data[start:start + len(records)] = records["color"]
+        return len(records)
+
+    def save_matrices(self, swf):
+        """Writes all matrices as tag 8 records."""
+        records = numpy.zeros(len(self.matrices), MATRIX_RECORD)
+        records["tag"] = 8
+        records["length"] = 24
+
+        matrices = self.matrices.array
+        records["matrix"][:, :4] = numpy.rint(matrices[:, :4] * 1024)
+        records["matrix"][:, 4:] = numpy.rint(matrices[:, 4:] * 20)
+
+        swf.writer.write(records.tobytes())
+
+    def save_color_transforms(self, swf):
+        """Writes all color transforms as tag 9 records."""
+        records = numpy.zeros(len(self.color_transforms), COLOR_RECORD)
+        records["tag"] = 9
+        records["length"] = 7
+        records["color"] = self.color_transforms.array
+
+        swf.writer.write(records.tobytes())
 
     def save(self):
         super().save()
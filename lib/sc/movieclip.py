@@ -1,10 +1,16 @@
 from enum import Enum
 
+import numpy as np
+
 from lib.console import Console
 
 from .writable import Writable
 
 
+# frame elements of a movieclip are stored in one table of these records,
+# MovieClipFrame.elements is a slice of it
+ELEMENT_DTYPE = np.dtype([("bind", "<u2"), ("matrix", "<u2"), ("color", "<u2")])
+
 # all blend modes used in Supercell games
 BLENDMODES = [
     None,  # "mix" by default
@@ -97,32 +103,21 @@ class MovieClip(Writable):
                     raise Exception(f"Unknown custom property {property_type} at {swf.reader.tell()}")
 
         if (tag != 3):
-            frame_elements = []
             frame_elements_count = swf.reader.read_int()
-            for x in range(frame_elements_count):
-                bind_index = swf.reader.read_ushort()
-                matrix_index = swf.reader.read_ushort()
-                color_index = swf.reader.read_ushort()
-
-                frame_elements.append({
-                    "bind": bind_index,
-                    "matrix": matrix_index,
-                    "color": color_index
-                })
+            frame_elements = swf.reader.read_array(ELEMENT_DTYPE, frame_elements_count)
 
         binds_count = swf.reader.read_ushort()
 
-        for x in range(binds_count):
+        for bind_id in swf.reader.read_ushort_array(binds_count).tolist():
             self.binds.append({
-                "id": swf.reader.read_ushort(),
+                "id": bind_id,
                 "blend": BLENDMODES[0]
             })
 
         if tag in (12, 35, 49):
-            for x in range(binds_count):
-                blend_index = swf.reader.read_uchar() & 0x3F
+            for x, (blend_index,) in enumerate(swf.reader.read_struct_array("<B", binds_count)):
                 # reversed = (bind_index >> 6) & 1 # TODO: blend modes
-                self.binds[x]["blend"] = BLENDMODES[blend_index]
+                self.binds[x]["blend"] = BLENDMODES[blend_index & 0x3F]
 
         for x in range(binds_count):
             self.binds[x]["name"] = swf.reader.read_ascii()
@@ -130,8 +125,7 @@ class MovieClip(Writable):
         frames_loaded = 0
         frame_elements_offset = 0
         while True:
-            frame_tag = swf.reader.read_uchar()
-            frame_tag_length = swf.reader.read_int()
+            frame_tag, frame_tag_length = swf.reader.read_struct("<Bi")
 
             if frame_tag == MovieClip.MOVIECLIP_END_FRAME_TAG:
                 break
@@ -139,25 +133,16 @@ class MovieClip(Writable):
             if frame_tag in MovieClip.MOVIECLIP_FRAME_TAGS:
                 elements_count = self.frames[frames_loaded].load(swf)
                 if frame_tag == 5:
-                    for x in range(elements_count):
-                        self.frames[frames_loaded].elements.append(
-                            {
-                                "bind": swf.reader.read_ushort(),
-                                "matrix": swf.reader.read_ushort(),
-                                "color": swf.reader.read_ushort()
-                            }
-                        )
+                    self.frames[frames_loaded].elements = swf.reader.read_array(ELEMENT_DTYPE, elements_count)
                 else:
-                    for x in range(elements_count):
-                        self.frames[frames_loaded].elements.append(
-                            frame_elements[frame_elements_offset + x])
+                    self.frames[frames_loaded].elements = frame_elements[frame_elements_offset:frame_elements_offset + elements_count]
                     frame_elements_offset += elements_count
                     
                 frames_loaded += 1
                 continue
 
             elif frame_tag == MovieClip.MOVIECLIP_SCALING_GRID_TAG:
-                self.nine_slice = [swf.reader.read_twip() for _ in range(4)]
+                self.nine_slice = [value / 20 for value in swf.reader.read_struct("<4i")]
                 continue
 
             elif frame_tag == MovieClip.MOVIECLIP_MATRIX_BANK_TAG:
@@ -170,6 +155,13 @@ class MovieClip(Writable):
 
         return id
 
+    @property
+    def elements(self) -> np.ndarray:
+        """Elements of all frames as one ELEMENT_DTYPE table."""
+        if not self.frames:
+            return np.empty(0, ELEMENT_DTYPE)
+        return np.concatenate([frame.elements for frame in self.frames]).astype(ELEMENT_DTYPE, copy=False)
+
     def save(self, id: int, ids: list):
         super().save()
 
@@ -177,16 +169,10 @@ class MovieClip(Writable):
         self.write_uchar(self.frame_rate)
         self.write_ushort(len(self.frames))
 
-        frame_elements = []
-        for frame in self.frames:
-            for element in frame.elements:
-                frame_elements.append(element)
+        frame_elements = self.elements
 
         self.write_int(len(frame_elements))
-        for element in frame_elements:
-            self.write_ushort(element["bind"])
-            self.write_ushort(element["matrix"])
-            self.write_ushort(element["color"])
+        self.write(frame_elements.tobytes())
 
         self.write_ushort(len(self.binds))
 
@@ -240,7 +226,7 @@ class MovieClip(Writable):
 
 class MovieClipFrame(Writable):
     def __init__(self) -> None:
-        self.elements: list = []
+        self.elements: np.ndarray = np.empty(0, ELEMENT_DTYPE)
         self.name: str = None
 
     def load(self, swf):
@@ -257,7 +243,16 @@ class MovieClipFrame(Writable):
 
         return 11, self.buffer
 
+    def __getstate__(self):
+        # Elements are pickled as raw bytes, unpickling thousands of small arrays is slow
+        value, position, attributes = super().__getstate__()
+        return value, position, dict(attributes, elements=self.elements.tobytes())
+
+    def __setstate__(self, state):
+        value, position, attributes = state
+        super().__setstate__((value, position, dict(attributes, elements=np.frombuffer(attributes["elements"], ELEMENT_DTYPE))))
+
     def __eq__(a, b):
         if a.name == b.name\
-                and a.elements == b.elements:
+                and np.array_equal(a.elements, b.elements):
             return False
@@ -3,6 +3,7 @@ from math import ceil, degrees, radians, atan2, cos, sin
 from lib.console import Console
 
 from .writable import Writable
+from ..utils import BinaryWriter
 
 import numpy as np
 from PIL import Image, ImageDraw
@@ -19,6 +20,102 @@ def get_size(coords):
     return right - left or 1, bottom - top or 1
 
 
+def crop_pixels(pixels: np.ndarray, left: int, top: int, right: int, bottom: int) -> np.ndarray:
+    """Like Image.crop, parts of the box outside of the pixels are zeros."""
+    height, width = pixels.shape[:2]
+    if left >= 0 and top >= 0 and right <= width and bottom <= height:
+        return pixels[top:bottom, left:right]
+
+    region = np.zeros((bottom - top, right - left) + pixels.shape[2:], pixels.dtype)
+    x0, y0, x1, y1 = max(left, 0), max(top, 0), min(right, width), min(bottom, height)
+    if x0 < x1 and y0 < y1:
+        region[y0 - top:y1 - top, x0 - left:x1 - left] = pixels[y0:y1, x0:x1]
+    return region
+
+
+def is_clockwise(points: np.ndarray) -> np.ndarray:
+    """Winding of stacked (M, N, 2) polygons, summed point by point like ShapeDrawBitmapCommand.get_rotation."""
+    points_sum = np.zeros(len(points))
+    for x in range(points.shape[1]):
+        x1, y1 = points[:, (x + 1) % points.shape[1]].T
+        x2, y2 = points[:, x].T
+        points_sum += (x1 - x2) * (y1 + y2)
+    return points_sum < 0
+
+
+def get_rotations(uv_coords: np.ndarray, xy_coords: np.ndarray) -> tuple:
+    """Nearest 90 degrees rotation and mirroring of stacked commands, see ShapeDrawBitmapCommand.get_rotation."""
+    mirroring = is_clockwise(uv_coords) != is_clockwise(xy_coords)
+
+    # math.atan2 instead of np.arctan2, they differ in the last bit for some inputs
+    # and angles close to 45 degrees would be rounded to another side then
+    dx, dy = (xy_coords[:, 1] - xy_coords[:, 0]).T.tolist()
+    du, dv = (uv_coords[:, 1] - uv_coords[:, 0]).T.tolist()
+    angle_xy = np.degrees(np.array([atan2(y, x) for x, y in zip(dx, dy)]) + 360) % 360
+    angle_uv = np.degrees(np.array([atan2(v, u) for u, v in zip(du, dv)]) + 360) % 360
+
+    angle = (angle_xy - angle_uv + 360) % 360
+    angle[mirroring] -= 180
+
+    return (np.round(angle / 90) * 90).astype(np.int64), mirroring
+
+
+def estimate_affine(origin: np.ndarray, convrt: np.ndarray) -> tuple:
+    """Least squares affine transforms of stacked (M, N, 2) point pairs with N >= 3.
+    Same closed form and order of operations as affine6p.estimate, so the results are bit for bit equal.
+    Returns (M, 6) params and a mask of singular systems, affine6p raises ZeroDivisionError for them."""
+    ox, oy = np.moveaxis(origin.astype(np.float64), -1, 0)
+    cx, cy = np.moveaxis(convrt.astype(np.float64), -1, 0)
+
+    mat00 = mat11 = mat22 = mat01 = mat10 = mat02 = mat20 = mat12 = mat21 = np.zeros(len(origin))
+    vec0 = vec1 = vec2 = vec3 = vec4 = vec5 = np.zeros(len(origin))
+    for i in range(origin.shape[1]):
+        mat00 = mat00 + ox[:, i] * ox[:, i]
+        mat01 = mat01 + ox[:, i] * oy[:, i]
+        mat02 = mat02 + ox[:, i]
+        mat10 = mat10 + ox[:, i] * oy[:, i]
+        mat11 = mat11 + oy[:, i] * oy[:, i]
+        mat12 = mat12 + oy[:, i]
+        mat20 = mat20 + ox[:, i]
+        mat21 = mat21 + oy[:, i]
+        mat22 = mat22 + 1
+
+        vec0 = vec0 + ox[:, i] * cx[:, i]
+        vec1 = vec1 + oy[:, i] * cx[:, i]
+        vec2 = vec2 + cx[:, i]
+        vec3 = vec3 + ox[:, i] * cy[:, i]
+        vec4 = vec4 + oy[:, i] * cy[:, i]
+        vec5 = vec5 + cy[:, i]
+
+    det = (mat00 * mat11 * mat22 + mat10 * mat21 * mat02 + mat20 * mat01 * mat12)
+    det = det - (mat00 * mat21 * mat12 + mat20 * mat11 * mat02 + mat10 * mat01 * mat22)
+
+    # Singular systems get a dummy determinant, their params are not used
+    singular = np.abs(det) < 1e-8
+    inv_det = 1.0 / np.where(singular, 1.0, det)
+
+    inv_mat00 = inv_det * (mat11 * mat22 - mat12 * mat21)
+    inv_mat01 = inv_det * (mat12 * mat20 - mat10 * mat22)
+    inv_mat02 = inv_det * (mat10 * mat21 - mat11 * mat20)
+    inv_mat10 = inv_mat01
+    inv_mat11 = inv_det * (mat22 * mat00 - mat20 * mat02)
+    inv_mat12 = inv_det * (mat20 * mat01 - mat21 * mat00)
+    inv_mat20 = inv_mat02
+    inv_mat21 = inv_mat12
+    inv_mat22 = inv_det * (mat00 * mat11 - mat01 * mat10)
+
+    params = np.stack((
+        inv_mat00 * vec0 + inv_mat01 * vec1 + inv_mat02 * vec2,
+        inv_mat10 * vec0 + inv_mat11 * vec1 + inv_mat12 * vec2,
+        inv_mat00 * vec3 + inv_mat01 * vec4 + inv_mat02 * vec5,
+        inv_mat10 * vec3 + inv_mat11 * vec4 + inv_mat12 * vec5,
+        inv_mat20 * vec0 + inv_mat21 * vec1 + inv_mat22 * vec2,
+        inv_mat20 * vec3 + inv_mat21 * vec4 + inv_mat22 * vec5
+    ), axis=1)
+
+    return params, singular
+
+
 class Shape(Writable):
     SHAAPE_END_COMMAND_TAG = 0
 
@@ -42,8 +139,7 @@ class Shape(Writable):
 
         bitmaps_loaded = 0
         while True:
-            bitmap_tag = swf.reader.read_uchar()
-            bitmap_tag_length = swf.reader.read_int()
+            bitmap_tag, bitmap_tag_length = swf.reader.read_struct("<Bi")
 
             if bitmap_tag == Shape.SHAAPE_END_COMMAND_TAG:
                 break
@@ -100,68 +196,68 @@ class Shape(Writable):
         return False
 
 
-class ShapeDrawBitmapCommand(Writable):
+class ShapeDrawBitmapCommand:
+    """Textured polygon of a shape. Coordinates are (N, 2) arrays, xy in pixels and uv in texture pixels."""
+
+    __slots__ = ("texture_index", "uv_coords", "xy_coords", "max_rects")
+
     def __init__(self) -> None:
         self.texture_index: int = -1
-        self.uv_coords: list = []
-        self.xy_coords: list = []
+        self.uv_coords: np.ndarray = np.empty((0, 2), np.int32)
+        self.xy_coords: np.ndarray = np.empty((0, 2), np.float64)
 
         self.max_rects: bool = False
 
+    def __getstate__(self):
+        # Coordinates are pickled as raw bytes, unpickling two small arrays per bitmap is slow
+        return (self.texture_index, self.max_rects,
+                self.uv_coords.dtype.str, self.uv_coords.tobytes(), self.xy_coords.dtype.str, self.xy_coords.tobytes())
+
+    def __setstate__(self, state):
+        self.texture_index, self.max_rects, uv_dtype, uv_coords, xy_dtype, xy_coords = state
+        self.uv_coords = np.frombuffer(uv_coords, uv_dtype).reshape(-1, 2)
+        self.xy_coords = np.frombuffer(xy_coords, xy_dtype).reshape(-1, 2)
+
     def load(self, swf, tag: int):
         self.texture_index = swf.reader.read_uchar()
 
         self.max_rects = tag == 4
         points_count = 4 if self.max_rects else swf.reader.read_uchar()
 
-        for i in range(points_count):
-            x = swf.reader.read_twip()
-            y = swf.reader.read_twip()
-            self.xy_coords.append([x, y])
-
-        for i in range(points_count):
-            w = swf.reader.read_ushort()
-            h = swf.reader.read_ushort()
+        self.xy_coords = swf.reader.read_array(np.dtype("<i4"), points_count * 2).reshape(-1, 2) / 20
 
-            if tag == 22:
-                w = w / 0xFFFF * swf.textures[self.texture_index].width
-                h = h / 0xFFFF * swf.textures[self.texture_index].height
-
-            u, v = [ceil(i) for i in [w, h]]
+        uv_coords = swf.reader.read_array(np.dtype("<u2"), points_count * 2).reshape(-1, 2)
+        if tag == 22:
+            width = swf.textures[self.texture_index].width
+            height = swf.textures[self.texture_index].height
+            self.uv_coords = np.ceil(uv_coords / 0xFFFF * (width, height)).astype(np.int32)
+        else:
+            self.uv_coords = uv_coords.astype(np.int32)
 
-            self.uv_coords.append([u, v])
     def save(self, swf):
-        super().save()
+        writer = BinaryWriter()
 
         tag = 4 if self.max_rects else 22
         points_count = 4 if self.max_rects else len(self.xy_coords)
 
-        self.write_uchar(self.texture_index)
+        writer.write_uchar(self.texture_index)
 
         if not self.max_rects:
-            self.write_uchar(points_count)
+            writer.write_uchar(points_count)
 
         if (swf.textures[self.texture_index].mag_filter, swf.textures[self.texture_index].min_filter) == (
                 "GL_NEAREST", "GL_NEAREST") and not self.max_rects:
             tag = 17
 
-        for coord in self.xy_coords[:points_count]:
-            x, y = coord
-
-            self.write_twip(x)
-            self.write_twip(y)
-
-        for coord in self.uv_coords[:points_count]:
-            u, v = coord
-
-            if tag == 22:
-                u *= 0xFFFF / swf.textures[self.texture_index].width
-                v *= 0xFFFF / swf.textures[self.texture_index].height
+        writer.write(np.round(np.asarray(self.xy_coords[:points_count]) * 20).astype("<i4").tobytes())
 
-            self.write_ushort(int(u))
-            self.write_ushort(int(v))
+        uv_coords = np.asarray(self.uv_coords[:points_count], np.float64)
+        if tag == 22:
+            uv_coords = uv_coords * (0xFFFF / swf.textures[self.texture_index].width,
+                                     0xFFFF / swf.textures[self.texture_index].height)
+        writer.write(uv_coords.astype("<u2").tobytes())
 
-        return tag, self.buffer
+        return tag, writer.buffer
 
     def get_image(self, swf) -> Image:
         texture = swf.textures[self.texture_index]
@@ -174,33 +270,36 @@ class ShapeDrawBitmapCommand(Writable):
             h = 1
 
         if w + h == 2:
-            x, y = self.uv_coords[0]
+            x, y = self.uv_coords[0].tolist()
             return Image.new(image.mode, (1, 1), image.getpixel((x, y)))
 
-        mask = Image.new("L", (texture.width, texture.height), 0)
-
-        color = 255
-        ImageDraw.Draw(mask).polygon([(x, y) for x, y in self.uv_coords], fill=color)
+        # Everything is done inside the bounding box of the polygon instead of the whole texture
+        left, top = self.uv_coords.min(axis=0).tolist()
+        region = crop_pixels(texture.get_pixels(), left, top, left + w, top + h)
 
-        left = min(x for x, _ in self.uv_coords)
-        top = min(y for _, y in self.uv_coords)
-        right = max(x for x, _ in self.uv_coords)
-        bottom = max(y for _, y in self.uv_coords)
+        if self.is_rect():
+            region = region.copy()
+        else:
+            # PIL rounds edge intersections from absolute x coordinates, so only rows are shifted to keep the
+            # result identical to a mask of the whole texture, the columns left of the box are cut off after
+            mask = Image.new("L", (left + w, h), 0)
+            ImageDraw.Draw(mask).polygon([(x, y - top) for x, y in self.uv_coords.tolist()], fill=255)
 
-        if w == 1:
-            right += 1
-        if h == 1:
-            bottom += 1
+            mask = np.asarray(mask)[:, left:] != 0
+            region = region * (mask[..., None] if region.ndim == 3 else mask)
 
-        bbox = left, top, right, bottom
+        return Image.fromarray(region, image.mode)
 
-        sprite = Image.new(image.mode, (w, h))
-        sprite.paste(image.crop(bbox), (0, 0), mask.crop(bbox))
+    def is_rect(self) -> bool:
+        """Axis-aligned quad, its sprite is a plain crop of the texture."""
+        points = self.uv_coords.tolist()
+        if len(points) != 4 or len(set(map(tuple, points))) != 4:
+            return False
 
-        return sprite
+        return all((x0 == x1) != (y0 == y1) for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]))
 
     def get_matrix(self, custom_uv_coords: list = None, use_nearest: bool = False):
-        uv_coords = custom_uv_coords or self.uv_coords
+        uv_coords = self.uv_coords if custom_uv_coords is None or not len(custom_uv_coords) else np.asarray(custom_uv_coords)
 
         rotation = 0
         mirroring = False
@@ -209,55 +308,89 @@ class ShapeDrawBitmapCommand(Writable):
 
             rad = radians(rotation)
 
-            uv_coords = [
-                np.array(
-                    (
-                        (np.cos(rad), -np.sin(rad)),
-                        (np.sin(rad), np.cos(rad))
-                    )
-                ).dot(point).tolist() for point in self.uv_coords
-            ]
-
-            uv_coords = [[round(x), round(y)] for x, y in uv_coords]
+            rotation_matrix = np.array(
+                (
+                    (cos(rad), sin(rad)),
+                    (-sin(rad), cos(rad))
+                )
+            )
+            uv_coords = np.rint(self.uv_coords @ rotation_matrix).astype(np.int64)
 
             if mirroring:
-                uv_coords = [[-x, y] for x, y, in uv_coords]
-
-        sprite_box = []
-
-        for idx in range(len(uv_coords)):
-            if idx == 0:
-                sprite_box.append([0, 0])
-            else:
-                x_distance = uv_coords[idx][0] - uv_coords[idx - 1][0]
-                y_distance = uv_coords[idx][1] - uv_coords[idx - 1][1]
-
-                sprite_box.append([round(sprite_box[idx - 1][0] + x_distance, 3),
-                                   round(sprite_box[idx - 1][1] + y_distance, 3)])
+                uv_coords[:, 0] = -uv_coords[:, 0]
 
-            if sprite_box[idx][0] < 0:
-                sprite_box = [[x - sprite_box[idx][0], y] for x, y in sprite_box]
-
-            if sprite_box[idx][1] < 0:
-                sprite_box = [[x, y - sprite_box[idx][1]] for x, y in sprite_box]
+        # uv polygon shifted so that its bounding box starts at 0, 0
+        sprite_box = np.round(uv_coords - uv_coords.min(axis=0), 3).tolist()
 
         w, h = self.get_size(uv_coords)
         if w == 0 or h == 0:
             sprite_box = self.get_right_uv(False, sprite_box)
         
         try:
-            transform = estimate(sprite_box, self.xy_coords)
+            transform = estimate(sprite_box, self.xy_coords.tolist())
         except ZeroDivisionError:
             print("\n")
             print(sprite_box)
             print("\n")
-            print(self.xy_coords)
+            print(self.xy_coords.tolist())
             print("\n")
-            print(uv_coords)
+            print(uv_coords.tolist())
             print("\n\n")
             transform = Transform([1.0, 0.0, 0.0, 1.0, 0.0, 0.0])
 
         return transform, sprite_box, rotation, mirroring
+
+    @staticmethod
+    def get_matrices(bitmaps: list, custom_uv_coords: list = None, use_nearest: bool = False) -> list:
+        """get_matrix of many commands at once, custom_uv_coords has one entry per command if given.
+        Commands with the same number of points are stacked, the rare ones with an empty sprite box,
+        less than 3 points or a singular system go through get_matrix."""
+        results = [None] * len(bitmaps)
+
+        sources = []
+        groups = {}
+        for index, bitmap in enumerate(bitmaps):
+            custom = None if custom_uv_coords is None or use_nearest else custom_uv_coords[index]
+            source = bitmap.uv_coords if custom is None or not len(custom) else custom
+            sources.append(source)
+
+            if len(source) == len(bitmap.xy_coords) >= 3:
+                groups.setdefault(len(source), []).append(index)
+
+        for indices in groups.values():
+            xy_coords = np.stack([bitmaps[index].xy_coords for index in indices])
+            uv_coords = np.array([sources[index] for index in indices])
+
+            rotation = np.zeros(len(indices), np.int64)
+            mirroring = np.zeros(len(indices), bool)
+            if use_nearest:
+                uv_coords = uv_coords.astype(np.int64)
+                rotation, mirroring = get_rotations(uv_coords, xy_coords)
+
+                rad = np.radians(rotation)[:, None]
+                u, v = uv_coords[..., 0], uv_coords[..., 1]
+                uv_coords = np.rint(np.stack((u * np.cos(rad) - v * np.sin(rad), u * np.sin(rad) + v * np.cos(rad)), axis=-1)).astype(np.int64)
+                uv_coords[mirroring, :, 0] = -uv_coords[mirroring, :, 0]
+
+            # uv polygon shifted so that its bounding box starts at 0, 0
+            sprite_boxes = np.round(uv_coords - uv_coords.min(axis=1, keepdims=True), 3)
+            empty = (uv_coords.max(axis=1) == uv_coords.min(axis=1)).any(axis=1)
+
+            params, singular = estimate_affine(sprite_boxes, xy_coords)
+
+            fast = ~(empty | singular)
+            for index, params, sprite_box, rotation, mirroring in zip(
+                    np.asarray(indices)[fast].tolist(), params[fast].tolist(), sprite_boxes[fast].tolist(),
+                    rotation[fast].tolist(), mirroring[fast].tolist()):
+                results[index] = Transform(params), sprite_box, rotation, mirroring
+
+        for index, result in enumerate(results):
+            if result is None:
+                custom = None if custom_uv_coords is None else custom_uv_coords[index]
+                results[index] = bitmaps[index].get_matrix(custom, use_nearest)
+
+        return results
+
     @staticmethod
     def scale_around(point, center, scale):
         c_x, c_y = center
@@ -281,7 +414,7 @@ class ShapeDrawBitmapCommand(Writable):
         rads = atan2(-dY, dX)
         return degrees(rads)
     def get_right_uv(self, inside: bool, custom: list = None):
-        coords = custom if custom is not None else self.uv_coords
+        coords = custom if custom is not None else self.uv_coords.tolist()
 
         res = coords.copy()
         w, h = ShapeDrawBitmapCommand.get_size(coords)
@@ -320,23 +453,18 @@ class ShapeDrawBitmapCommand(Writable):
             return res
     def get_translation(self, centroid: bool = False):
         if centroid:
-            x_coords = [x for x, _ in self.xy_coords]
-            y_coords = [y for y, _ in self.xy_coords]
-
-            size = len(self.xy_coords)
-
-            x = sum(x_coords) / size
-            y = sum(y_coords) / size
+            x, y = self.xy_coords.mean(axis=0).tolist()
 
             return x, y
 
-        left = min(x for x, _ in self.xy_coords)
-        top = min(y for _, y in self.xy_coords)
+        left, top = self.xy_coords.min(axis=0).tolist()
 
         return left, top
 
     def get_rotation(self, nearest: bool = False):
+        # polygons have a handful of points, plain floats are faster than NumPy calls here
         def is_clockwise(points):
+            points = points.tolist()
             points_sum = 0
             for x in range(len(points)):
                 x1, y1 = points[(x + 1) % len(points)]
@@ -349,10 +477,10 @@ class ShapeDrawBitmapCommand(Writable):
 
         mirroring = not (uv_cw == xy_cw)
 
-        dx = self.xy_coords[1][0] - self.xy_coords[0][0]
-        dy = self.xy_coords[1][1] - self.xy_coords[0][1]
-        du = self.uv_coords[1][0] - self.uv_coords[0][0]
-        dv = self.uv_coords[1][1] - self.uv_coords[0][1]
+        (x0, y0), (x1, y1) = self.xy_coords[:2].tolist()
+        (u0, v0), (u1, v1) = self.uv_coords[:2].tolist()
+        dx, dy = x1 - x0, y1 - y0
+        du, dv = u1 - u0, v1 - v0
 
         angle_xy = degrees(atan2(dy, dx) + 360) % 360
         angle_uv = degrees(atan2(dv, du) + 360) % 360
@@ -369,12 +497,10 @@ class ShapeDrawBitmapCommand(Writable):
 
     @staticmethod
     def get_size(coords):
-        left = min(coord[0] for coord in coords)
-        top = min(coord[1] for coord in coords)
-        right = max(coord[0] for coord in coords)
-        bottom = max(coord[1] for coord in coords)
+        coords = np.asarray(coords)
+        width, height = (coords.max(axis=0) - coords.min(axis=0)).tolist()
 
-        return right - left, bottom - top
+        return width, height
 
     def get_scale(self):
         uv_x, uv_y = self.get_size(self.uv_coords)
@@ -384,8 +510,8 @@ class ShapeDrawBitmapCommand(Writable):
 
     def __eq__(a, b):
         if a.max_rects == b.max_rects\
-                and a.uv_coords == b.uv_coords\
-                and a.xy_coords == b.xy_coords\
+                and np.array_equal(a.uv_coords, b.uv_coords)\
+                and np.array_equal(a.xy_coords, b.xy_coords)\
                 and a.texture_index == b.texture_index:
             return True
         return False
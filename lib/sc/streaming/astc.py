@@ -0,0 +1,491 @@
+from functools import lru_cache
+
+import numpy as np
+
+# LDR profile only, HDR blocks and invalid encodings decode to the error color
+ERROR_COLOR = (255, 0, 255, 255)
+
+# Integer sequence encoding ranges: (levels, trits, quints, bits)
+ISE_RANGES = [
+    (2, 0, 0, 1), (3, 1, 0, 0), (4, 0, 0, 2), (5, 0, 1, 0), (6, 1, 0, 1), (8, 0, 0, 3),
+    (10, 0, 1, 1), (12, 1, 0, 2), (16, 0, 0, 4), (20, 0, 1, 2), (24, 1, 0, 3), (32, 0, 0, 5),
+    (40, 0, 1, 3), (48, 1, 0, 4), (64, 0, 0, 6), (80, 0, 1, 4), (96, 1, 0, 5), (128, 0, 0, 7),
+    (160, 0, 1, 5), (192, 1, 0, 6), (256, 0, 0, 8)
+]
+QUANT_6 = 4
+
+# Blocks decoded at once, bounds the size of temporary arrays
+CHUNK_BLOCKS = 1 << 13
+
+# Unquantization constants: bit layout of B (msb first, letters are bits of the low part) and C
+COLOR_UNQUANTIZE = {
+    6: ("000000000", 204), 12: ("b000b0bb0", 93), 24: ("cb000cbcb", 44),
+    48: ("dcb000dcb", 22), 96: ("edcb000ed", 11), 192: ("fedcb000f", 5),
+    10: ("000000000", 113), 20: ("b0000bb00", 54), 40: ("cb0000cbc", 26),
+    80: ("dcb0000dc", 13), 160: ("edcb0000e", 6)
+}
+WEIGHT_UNQUANTIZE = {
+    6: ("0000000", 50), 12: ("b000b0b", 23), 24: ("cb000cb", 11),
+    10: ("0000000", 28), 20: ("b0000b0", 13)
+}
+
+
+def bit_count(count, quant):
+    _, trits, quints, bits = ISE_RANGES[quant]
+    return count * bits + (count * 8 * trits + 4) // 5 + (count * 7 * quints + 2) // 3
+
+
+def decode_trits(t):
+    if bits_of(t, 4, 2) == 7:
+        c = (bits_of(t, 7, 5) << 2) | bits_of(t, 1, 0)
+        t4, t3 = 2, 2
+    else:
+        c = bits_of(t, 4, 0)
+        if bits_of(t, 6, 5) == 3:
+            t4, t3 = 2, bits_of(t, 7, 7)
+        else:
+            t4, t3 = bits_of(t, 7, 7), bits_of(t, 6, 5)
+
+    if bits_of(c, 1, 0) == 3:
+        t2, t1, t0 = 2, bits_of(c, 4, 4), (bits_of(c, 3, 3) << 1) | (bits_of(c, 2, 2) & ~bits_of(c, 3, 3) & 1)
+    elif bits_of(c, 3, 2) == 3:
+        t2, t1, t0 = 2, 2, bits_of(c, 1, 0)
+    else:
+        t2, t1, t0 = bits_of(c, 4, 4), bits_of(c, 3, 2), (bits_of(c, 1, 1) << 1) | (bits_of(c, 0, 0) & ~bits_of(c, 1, 1) & 1)
+    return t0, t1, t2, t3, t4
+
+
+def decode_quints(q):
+    if bits_of(q, 2, 1) == 3 and bits_of(q, 6, 5) == 0:
+        q0 = bits_of(q, 0, 0)
+        q2 = (q0 << 2) | ((bits_of(q, 4, 4) & ~q0 & 1) << 1) | (bits_of(q, 3, 3) & ~q0 & 1)
+        return 4, 4, q2
+
+    if bits_of(q, 2, 1) == 3:
+        q2 = 4
+        c = (bits_of(q, 4, 3) << 3) | ((~bits_of(q, 6, 5) & 3) << 1) | bits_of(q, 0, 0)
+    else:
+        q2 = bits_of(q, 6, 5)
+        c = bits_of(q, 4, 0)
+
+    if bits_of(c, 2, 0) == 5:
+        return bits_of(c, 4, 3), 4, q2
+    return bits_of(c, 2, 0), bits_of(c, 4, 3), q2
+
+
+def bits_of(value, high, low):
+    return (value >> low) & ((1 << (high - low + 1)) - 1)
+
+
+TRITS_TABLE = np.array([decode_trits(t) for t in range(256)], np.int32)
+QUINTS_TABLE = np.array([decode_quints(q) for q in range(128)], np.int32)
+
+
+def unquantize(quant, layouts, size):
+    """Maps (digit << bits | low bits) values of an ISE range to `size` bit values."""
+    levels, trits, quints, bits = ISE_RANGES[quant]
+    table = np.zeros(256, np.int32)
+
+    if not trits and not quints:
+        # Bit replication
+        for value in range(levels):
+            replicated = value
+            for _ in range(size // bits):
+                replicated = (replicated << bits) | value
+            table[value] = replicated >> ((size // bits + 1) * bits - size)
+        return table
+
+    if bits == 0:
+        return table
+
+    layout, c = layouts[levels]
+    for digit in range(3 if trits else 5):
+        for low in range(1 << bits):
+            a = ((1 << (size + 1)) - 1) if low & 1 else 0
+            b = 0
+            for letter in layout:
+                b = (b << 1) | (0 if letter == "0" else (low >> (ord(letter) - ord("a"))) & 1)
+
+            t = (digit * c + b) ^ a
+            table[(digit << bits) | low] = (a & (1 << (size - 1))) | (t >> 2)
+    return table
+
+
+COLOR_TABLES = [unquantize(quant, COLOR_UNQUANTIZE, 8) for quant in range(len(ISE_RANGES))]
+
+# Weights are unquantized to 0..64
+WEIGHT_TABLES = [unquantize(quant, WEIGHT_UNQUANTIZE, 6) for quant in range(12)]
+WEIGHT_TABLES = [np.where(table > 32, table + 1, table) for table in WEIGHT_TABLES]
+WEIGHT_TABLES[1][:3] = (0, 32, 64)
+WEIGHT_TABLES[3][:5] = (0, 16, 32, 48, 64)
+
+
+@lru_cache(maxsize=None)
+def ise_layout(count, quant):
+    """Bit positions of every value of an integer sequence and of packed trits / quints, -1 marks bits past its end."""
+    _, trits, quints, bits = ISE_RANGES[quant]
+    if trits:
+        steps = (2, 2, 1, 2, 1)
+    elif quints:
+        steps = (3, 2, 2)
+    else:
+        steps = (0,)
+    group_bits = len(steps) * bits + sum(steps)
+    groups = (count + len(steps) - 1) // len(steps)
+
+    low = np.zeros((count, bits), np.intp)
+    packed = np.full((groups, sum(steps)), -1, np.intp)
+    for i in range(count):
+        group, index = divmod(i, len(steps))
+        offset = sum(steps[:index])
+        position = group * group_bits + offset + index * bits
+
+        low[i] = position + np.arange(bits)
+        packed[group, offset:offset + steps[index]] = position + bits + np.arange(steps[index])
+
+    return low, packed
+
+
+def read_bits(stream, positions):
+    """Gathers little endian integers from bit positions (..., bits) of a (blocks, bits) 0/1 stream."""
+    return (stream[:, positions].astype(np.int64) << np.arange(positions.shape[-1])).sum(axis=-1)
+
+
+def decode_ise(stream, count, quant):
+    """Decodes (blocks, bits) stream of 0/1 values into (blocks, count) digit << bits | low values."""
+    _, trits, quints, bits = ISE_RANGES[quant]
+    low, packed = ise_layout(count, quant)
+
+    # Trits or quints past the end of the sequence read as zero
+    stream = np.concatenate([stream, np.zeros((len(stream), 1), np.uint8)], axis=1)
+    values = read_bits(stream, low)
+
+    if trits or quints:
+        packed = np.where(packed < 0, stream.shape[1] - 1, packed)
+        groups = read_bits(stream, packed)
+        table = TRITS_TABLE if trits else QUINTS_TABLE
+        digits = table[groups].reshape(len(stream), -1)[:, :count]
+        values |= digits << bits
+
+    return values
+
+
+@lru_cache(maxsize=None)
+def block_mode(mode, block_width, block_height):
+    """Returns (weights width, weights height, dual plane, weight quant, weight bits) or None for reserved modes."""
+    quant = (mode >> 4) & 1
+    high = (mode >> 9) & 1
+    dual = (mode >> 10) & 1
+    a = (mode >> 5) & 3
+
+    if mode & 3:
+        quant |= (mode & 3) << 1
+        b = (mode >> 7) & 3
+        kind = (mode >> 2) & 3
+        if kind == 0: width, height = b + 4, a + 2
+        elif kind == 1: width, height = b + 8, a + 2
+        elif kind == 2: width, height = a + 2, b + 8
+        elif mode & 0x100: width, height = (b & 1) + 2, a + 2
+        else: width, height = a + 2, (b & 1) + 6
+    else:
+        quant |= ((mode >> 2) & 3) << 1
+        if (mode >> 2) & 3 == 0:
+            return None
+
+        b = (mode >> 9) & 3
+        kind = (mode >> 7) & 3
+        if kind == 0: width, height = 12, a + 2
+        elif kind == 1: width, height = a + 2, 12
+        elif kind == 2: width, height, dual, high = a + 6, b + 6, 0, 0
+        elif a == 0: width, height = 6, 10
+        elif a == 1: width, height = 10, 6
+        else: return None
+
+    count = width * height * (dual + 1)
+    quant = quant - 2 + 6 * high
+    weight_bits = bit_count(count, quant)
+    if count > 64 or not 24 <= weight_bits <= 96 or width > block_width or height > block_height:
+        return None
+    return width, height, bool(dual), quant, weight_bits
+
+
+@lru_cache(maxsize=None)
+def infill(block_width, block_height, width, height):
+    """Grid indices and bilinear factors used to resample a weights grid to block texels."""
+    ds = (1024 + block_width // 2) // (block_width - 1)
+    dt = (1024 + block_height // 2) // (block_height - 1)
+
+    t, s = np.divmod(np.arange(block_width * block_height), block_width)
+    gs = (ds * s * (width - 1) + 32) >> 6
+    gt = (dt * t * (height - 1) + 32) >> 6
+    js, fs = gs >> 4, gs & 15
+    jt, ft = gt >> 4, gt & 15
+
+    w11 = (fs * ft + 8) >> 4
+    factors = np.stack([16 - fs - ft + w11, fs - w11, ft - w11, w11], axis=1)
+    v0 = js + jt * width
+    indices = np.stack([v0, v0 + 1, v0 + width, v0 + width + 1], axis=1)
+
+    # Neighbours outside of the grid always have zero factor
+    indices = np.minimum(indices, width * height - 1)
+    return indices, factors
+
+
+def hash52(value):
+    value = value.astype(np.uint32)
+    value ^= value >> 15
+    value *= np.uint32(0xEEDE0891)
+    value ^= value >> 5
+    value += value << 16
+    value ^= value >> 7
+    value ^= value >> 3
+    value ^= value << 6
+    value ^= value >> 17
+    return value
+
+
+@lru_cache(maxsize=None)
+def partition_table(block_width, block_height, partitions):
+    """(1024 seeds, texels) partition index of every texel."""
+    seed = np.arange(1024, dtype=np.int64)[:, None]
+    y, x = np.divmod(np.arange(block_width * block_height, dtype=np.int64), block_width)
+    if block_width * block_height < 31:
+        x, y = x << 1, y << 1
+
+    rnum = hash52(seed + (partitions - 1) * 1024).astype(np.int64)
+    shifts = [0, 4, 8, 12, 16, 20, 24, 28]
+    seeds = [((rnum >> shift) & 0xF) ** 2 for shift in shifts]
+
+    odd = (seed & 1).astype(bool)
+    small = np.where(seed & 2, 4, 5)
+    other = 6 if partitions == 3 else 5
+    sh1 = np.where(odd, small, other)
+    sh2 = np.where(odd, other, small)
+
+    a = (seeds[0] >> sh1) * x + (seeds[1] >> sh2) * y + (rnum >> 14)
+    b = (seeds[2] >> sh1) * x + (seeds[3] >> sh2) * y + (rnum >> 10)
+    c = (seeds[4] >> sh1) * x + (seeds[5] >> sh2) * y + (rnum >> 6)
+    d = (seeds[6] >> sh1) * x + (seeds[7] >> sh2) * y + (rnum >> 2)
+
+    a, b, c, d = a & 0x3F, b & 0x3F, c & 0x3F, d & 0x3F
+    if partitions < 4: d = d * 0
+    if partitions < 3: c = c * 0
+
+    return np.select(
+        [(a >= b) & (a >= c) & (a >= d), (b >= c) & (b >= d), c >= d],
+        [0, 1, 2], 3
+    ).astype(np.intp)
+
+
+def bit_transfer_signed(a, b):
+    b = (b >> 1) | (a & 0x80)
+    a = (a >> 1) & 0x3F
+    return np.where(a & 0x20, a - 0x40, a), b
+
+
+def blue_contract(r, g, b, a):
+    return (r + b) >> 1, (g + b) >> 1, b, a
+
+
+def decode_endpoints(mode, v):
+    """Decodes (blocks, values) color endpoint integers into two (blocks, 4) LDR endpoints."""
+    opaque = np.full(len(v), 255, np.int32)
+    v = [v[:, i] for i in range(v.shape[1])]
+
+    if mode == 0:
+        e0, e1 = (v[0], v[0], v[0], opaque), (v[1], v[1], v[1], opaque)
+    elif mode == 1:
+        l0 = (v[0] >> 2) | (v[1] & 0xC0)
+        l1 = np.minimum(l0 + (v[1] & 0x3F), 255)
+        e0, e1 = (l0, l0, l0, opaque), (l1, l1, l1, opaque)
+    elif mode == 4:
+        e0, e1 = (v[0], v[0], v[0], v[2]), (v[1], v[1], v[1], v[3])
+    elif mode == 5:
+        v[1], v[0] = bit_transfer_signed(v[1], v[0])
+        v[3], v[2] = bit_transfer_signed(v[3], v[2])
+        e0 = (v[0], v[0], v[0], v[2])
+        e1 = (v[0] + v[1], v[0] + v[1], v[0] + v[1], v[2] + v[3])
+    elif mode in (6, 10):
+        alpha0, alpha1 = (v[4], v[5]) if mode == 10 else (opaque, opaque)
+        e0 = ((v[0] * v[3]) >> 8, (v[1] * v[3]) >> 8, (v[2] * v[3]) >> 8, alpha0)
+        e1 = (v[0], v[1], v[2], alpha1)
+    elif mode in (8, 12):
+        alpha0, alpha1 = (v[6], v[7]) if mode == 12 else (opaque, opaque)
+        ordered = v[1] + v[3] + v[5] >= v[0] + v[2] + v[4]
+        first, second = (v[0], v[2], v[4], alpha0), (v[1], v[3], v[5], alpha1)
+        contracted0, contracted1 = blue_contract(*second), blue_contract(*first)
+        e0 = tuple(np.where(ordered, f, c) for f, c in zip(first, contracted0))
+        e1 = tuple(np.where(ordered, s, c) for s, c in zip(second, contracted1))
+    elif mode in (9, 13):
+        for i in range(0, 8 if mode == 13 else 6, 2):
+            v[i + 1], v[i] = bit_transfer_signed(v[i + 1], v[i])
+        alpha0, alpha1 = (v[6], v[6] + v[7]) if mode == 13 else (opaque, opaque)
+        ordered = v[1] + v[3] + v[5] >= 0
+        base, offset = (v[0], v[2], v[4], alpha0), (v[0] + v[1], v[2] + v[3], v[4] + v[5], alpha1)
+        contracted0, contracted1 = blue_contract(*offset), blue_contract(*base)
+        e0 = tuple(np.where(ordered, b, c) for b, c in zip(base, contracted0))
+        e1 = tuple(np.where(ordered, o, c) for o, c in zip(offset, contracted1))
+    else:
+        return None
+
+    return np.clip(np.stack(e0, axis=1), 0, 255), np.clip(np.stack(e1, axis=1), 0, 255)
+
+
+def decode_void_extent(low, high):
+    """Returns constant colors of void extent blocks and which of them are valid LDR blocks."""
+    # Reserved bits must be set, HDR blocks are not supported
+    valid = ((low >> np.uint64(9)) & np.uint64(7)) == np.uint64(6)
+
+    extents = [(low >> np.uint64(shift)) & np.uint64(0x1FFF) for shift in (12, 25, 38, 51)]
+    all_ones = np.logical_and.reduce([extent == np.uint64(0x1FFF) for extent in extents])
+    valid &= all_ones | ((extents[0] < extents[1]) & (extents[2] < extents[3]))
+
+    # UNORM16 colors, only the top 8 bits are used
+    color = np.stack([(high >> np.uint64(shift + 8)) & np.uint64(0xFF) for shift in (0, 16, 32, 48)], axis=1)
+    return color.astype(np.uint8), valid
+
+
+def decode_group(stream, key, block_width, block_height, srgb):
+    """Decodes blocks sharing block mode, partition count and endpoint modes, returns None for error blocks."""
+    mode, partitions, cem_bits = key & 0x7FF, ((key >> 11) & 3) + 1, key >> 13
+    width, height, dual, weight_quant, weight_bits = block_mode(mode, block_width, block_height)
+    if partitions == 4 and dual:
+        return None
+
+    if partitions == 1:
+        endpoint_modes, extra_bits, color_start = [cem_bits], 0, 17
+    elif cem_bits & 3 == 0:
+        endpoint_modes, extra_bits, color_start = [cem_bits >> 2] * partitions, 0, 29
+    else:
+        base = (cem_bits & 3) - 1
+        endpoint_modes = [
+            ((base + ((cem_bits >> (2 + i)) & 1)) << 2) | ((cem_bits >> (2 + partitions + 2 * i)) & 3)
+            for i in range(partitions)
+        ]
+        extra_bits, color_start = 3 * partitions - 4, 29
+
+    color_count = sum(2 * ((m >> 2) + 1) for m in endpoint_modes)
+    color_end = 128 - weight_bits - extra_bits - (2 if dual else 0)
+    if color_count > 18:
+        return None
+
+    color_quant = max((q for q in range(len(ISE_RANGES)) if bit_count(color_count, q) <= color_end - color_start), default=-1)
+    if color_quant < QUANT_6:
+        return None
+
+    # Color endpoints for every partition
+    values = COLOR_TABLES[color_quant][decode_ise(stream[:, color_start:color_end], color_count, color_quant)]
+    endpoints, offset = [], 0
+    for m in endpoint_modes:
+        count = 2 * ((m >> 2) + 1)
+        decoded = decode_endpoints(m, values[:, offset:offset + count])
+        if decoded is None:
+            # HDR endpoints only turn their own partition into the error color
+            decoded = [np.tile(ERROR_COLOR, (len(values), 1))] * 2
+        endpoints.append(np.stack(decoded, axis=1))
+        offset += count
+    endpoints = np.stack(endpoints, axis=1).astype(np.int32)
+
+    # Weights are stored from the top of the block in reverse bit order
+    weight_count = width * height * (2 if dual else 1)
+    weights = WEIGHT_TABLES[weight_quant][decode_ise(stream[:, :127 - weight_bits:-1], weight_count, weight_quant)]
+
+    indices, factors = infill(block_width, block_height, width, height)
+    planes = []
+    for plane in range(2 if dual else 1):
+        grid = weights[:, plane::2] if dual else weights
+        planes.append(((grid[:, indices] * factors).sum(axis=2) + 8) >> 4)
+
+    texel_weights = np.repeat(planes[0][:, :, None].astype(np.int32), 4, axis=2)
+    if dual:
+        selector = read_bits(stream, np.arange(color_end, color_end + 2))
+        texel_weights = np.where(np.arange(4) == selector[:, None, None], planes[1][:, :, None], texel_weights)
+
+    if partitions == 1:
+        texel_endpoints = np.repeat(endpoints, block_width * block_height, axis=1)
+    else:
+        seed = read_bits(stream, np.arange(13, 23))
+        texel_partitions = partition_table(block_width, block_height, partitions)[seed]
+        texel_endpoints = endpoints[np.arange(len(endpoints))[:, None], texel_partitions]
+
+    # Endpoints are expanded to 16 bits, sRGB color channels are centered instead of replicated
+    e0, e1 = texel_endpoints[:, :, 0] * 257, texel_endpoints[:, :, 1] * 257
+    if srgb:
+        e0[..., :3] = texel_endpoints[:, :, 0, :3] << 8 | 0x80
+        e1[..., :3] = texel_endpoints[:, :, 1, :3] << 8 | 0x80
+
+    color = (e0 * (64 - texel_weights) + e1 * texel_weights + 32) >> 6
+    return (color >> 8).astype(np.uint8)
+
+
+@lru_cache(maxsize=None)
+def block_modes(block_width, block_height):
+    """Validity and weight bits of all 2048 block modes for a block footprint."""
+    modes = [block_mode(mode, block_width, block_height) for mode in range(2048)]
+    return np.array([m is not None for m in modes]), np.array([m[4] if m else 0 for m in modes])
+
+
+def decode_astc(data, width, height, block_width, block_height, srgb: bool = False):
+    """Decodes 128 bit ASTC LDR blocks into a (height, width, 4) RGBA array."""
+    blocks_x = (width + block_width - 1) // block_width
+    blocks_y = (height + block_height - 1) // block_height
+    count = blocks_x * blocks_y
+
+    blocks = np.frombuffer(data, np.uint8, count * 16).reshape(count, 16)
+    halves = blocks.view("<u8")
+    low, high = halves[:, 0], halves[:, 1]
+
+    output = np.empty((count, block_width * block_height, 4), np.uint8)
+    output[:] = ERROR_COLOR
+
+    mode = (low & np.uint64(0x7FF)).astype(np.int64)
+    void_extent = (mode & 0x1FF) == 0x1FC
+    color, valid = decode_void_extent(low[void_extent], high[void_extent])
+    output[np.flatnonzero(void_extent)[valid]] = color[valid][:, None]
+
+    valid_modes, weight_bits = block_modes(block_width, block_height)
+    normal = ~void_extent & valid_modes[mode]
+    stream = np.unpackbits(blocks, axis=1, bitorder="little")
+
+    # Endpoint modes of blocks with several partitions may continue right below the weights
+    partitions = ((low >> np.uint64(11)) & np.uint64(3)).astype(np.int64)
+    cem_bits = np.where(partitions == 0, (low >> np.uint64(13)) & np.uint64(0xF), (low >> np.uint64(23)) & np.uint64(0x3F)).astype(np.int64)
+
+    extended = np.flatnonzero(normal & (partitions > 0) & (cem_bits & 3 != 0))
+    extra_size = 3 * (partitions[extended] + 1) - 4
+    extra_start = 128 - weight_bits[mode[extended]] - extra_size
+    for size in np.unique(extra_size):
+        selected = extended[extra_size == size]
+        positions = extra_start[extra_size == size, None] + np.arange(size)
+        extra = (stream[selected[:, None], positions].astype(np.int64) << np.arange(size)).sum(axis=1)
+        cem_bits[selected] |= extra << 6
+
+    # Blocks are decoded in groups sharing block mode, partition count and endpoint modes
+    keys = mode | partitions << 11 | cem_bits << 13
+    normal_indices = np.flatnonzero(normal)
+    unique_keys, inverse, counts = np.unique(keys[normal_indices], return_inverse=True, return_counts=True)
+    groups = np.split(normal_indices[np.argsort(inverse, kind="stable")], np.cumsum(counts)[:-1])
+
+    for key, group in zip(unique_keys, groups):
+        for start in range(0, len(group), CHUNK_BLOCKS):
+            selected = group[start:start + CHUNK_BLOCKS]
+            pixels = decode_group(stream[selected], int(key), block_width, block_height, srgb)
+            if pixels is not None:
+                output[selected] = pixels
+
+    image = output.reshape(blocks_y, blocks_x, block_height, block_width, 4).transpose(0, 2, 1, 3, 4)
+    return image.reshape(blocks_y * block_height, blocks_x * block_width, 4)[:height, :width]
+
+
+ASTC_BLOCK_SIZES = [(4, 4), (5, 4), (5, 5), (6, 5), (6, 6), (8, 5), (8, 6), (8, 8), (10, 5), (10, 6), (10, 8), (10, 10), (12, 10), (12, 12)]
+
+
+def astc_decoder(block_width, block_height, srgb):
+    return lambda data, width, height: decode_astc(data, width, height, block_width, block_height, srgb)
+
+
+# Keyed by glInternalFormat, every decoder returns a (height, width, 4) RGBA array
+ASTC_DECODERS = {
+    **{0x93B0 + i: astc_decoder(w, h, False) for i, (w, h) in enumerate(ASTC_BLOCK_SIZES)},
+    **{0x93D0 + i: astc_decoder(w, h, True) for i, (w, h) in enumerate(ASTC_BLOCK_SIZES)},
+}
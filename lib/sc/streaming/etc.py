@@ -0,0 +1,277 @@
+import numpy as np
+
+# ETC1 / ETC2 intensity modifiers, ordered by pixel index (msb << 1 | lsb): +a, +b, -a, -b
+ETC_MODIFIERS = np.array([
+    [2, 8, -2, -8],
+    [5, 17, -5, -17],
+    [9, 29, -9, -29],
+    [13, 42, -13, -42],
+    [18, 60, -18, -60],
+    [24, 80, -24, -80],
+    [33, 106, -33, -106],
+    [47, 183, -47, -183]
+], np.int32)
+
+ETC2_DISTANCES = np.array([3, 6, 11, 16, 23, 32, 41, 64], np.int32)
+
+EAC_MODIFIERS = np.array([
+    [-3, -6, -9, -15, 2, 5, 8, 14],
+    [-3, -7, -10, -13, 2, 6, 9, 12],
+    [-2, -5, -8, -13, 1, 4, 7, 12],
+    [-2, -4, -6, -13, 1, 3, 5, 12],
+    [-3, -6, -8, -12, 2, 5, 7, 11],
+    [-3, -7, -9, -11, 2, 6, 8, 10],
+    [-4, -7, -8, -11, 3, 6, 7, 10],
+    [-3, -5, -8, -11, 2, 4, 7, 10],
+    [-2, -6, -8, -10, 1, 5, 7, 9],
+    [-2, -5, -8, -10, 1, 4, 7, 9],
+    [-2, -4, -8, -10, 1, 3, 7, 9],
+    [-2, -5, -7, -10, 1, 4, 6, 9],
+    [-3, -4, -7, -10, 2, 3, 6, 9],
+    [-1, -2, -3, -10, 0, 1, 2, 9],
+    [-4, -6, -8, -9, 3, 5, 7, 8],
+    [-3, -5, -7, -9, 2, 4, 6, 8]
+], np.int32)
+
+# Blocks decoded at once, bounds the size of temporary arrays
+CHUNK_BLOCKS = 1 << 14
+
+# Pixels inside a block are numbered column by column: i = x * 4 + y
+PIXEL_X = np.arange(16) // 4
+PIXEL_Y = np.arange(16) % 4
+
+
+def bits(value, high, low):
+    return (value >> low) & ((1 << (high - low + 1)) - 1)
+
+
+def extend(value, size):
+    return (value << (8 - size)) | (value >> (2 * size - 8))
+
+
+def sign_extend_3(value):
+    return np.where(value >= 4, value - 8, value)
+
+
+def blocks_to_image(pixels, width, height):
+    """Turns (blocks, 16, channels) pixels of 4x4 blocks stored in rows into a (height, width, channels) image."""
+    blocks_x, blocks_y = (width + 3) // 4, (height + 3) // 4
+    channels = pixels.shape[-1]
+
+    # pixel i of a block sits at (i // 4, i % 4), so 16 pixels are (x, y) major
+    image = pixels.reshape(blocks_y, blocks_x, 4, 4, channels).transpose(0, 3, 1, 2, 4)
+    return image.reshape(blocks_y * 4, blocks_x * 4, channels)[:height, :width]
+
+
+def read_blocks(data, width, height, block_size):
+    count = ((width + 3) // 4) * ((height + 3) // 4)
+    return np.frombuffer(data, ">u8", count * block_size // 8).reshape(count, block_size // 8)
+
+
+def decode_etc2_color(block, punchthrough: bool = False, etc1: bool = False):
+    """Decodes 64 bit ETC1 / ETC2 color blocks into (blocks, 16, 4) RGBA pixels."""
+    high = (block >> np.uint64(32)).astype(np.int64)
+    low = (block & np.uint64(0xFFFFFFFF)).astype(np.int64)
+    count = len(block)
+
+    i = np.arange(16)
+    msb = (low[:, None] >> (16 + i)) & 1
+    lsb = (low[:, None] >> i) & 1
+    index = msb << 1 | lsb
+
+    # Individual and differential modes, punchthrough blocks are always differential and use bit 33 as opaque flag
+    diff = bits(high, 1, 1).astype(bool)
+    flip = bits(high, 0, 0).astype(bool)
+
+    opaque = np.ones(count, bool)
+    if punchthrough:
+        opaque, diff = diff, opaque
+
+    base = np.empty((count, 2, 3), np.int64)
+    for channel, shift in enumerate((24, 16, 8)):
+        individual = np.stack((bits(high, shift + 7, shift + 4), bits(high, shift + 3, shift)), -1)
+        base_5 = bits(high, shift + 7, shift + 3)
+        differential = np.stack((base_5, base_5 + sign_extend_3(bits(high, shift + 2, shift))), -1)
+
+        base[:, :, channel] = np.where(diff[:, None], extend(differential & 31, 5), extend(individual, 4))
+
+    tables = np.stack((bits(high, 7, 5), bits(high, 4, 2)), -1)
+    modifiers = ETC_MODIFIERS[tables]
+    if punchthrough:
+        modifiers = np.where(opaque[:, None, None], modifiers, modifiers * np.array([0, 1, 0, 1]))
+
+    # (blocks, subblock, index, channel)
+    palette = base[:, :, None, :] + modifiers[:, :, :, None]
+
+    subblock = np.where(flip[:, None], PIXEL_Y >= 2, PIXEL_X >= 2).astype(np.int64)
+
+    if not etc1:
+        red = bits(high, 31, 27) + sign_extend_3(bits(high, 26, 24))
+        green = bits(high, 23, 19) + sign_extend_3(bits(high, 18, 16))
+        blue = bits(high, 15, 11) + sign_extend_3(bits(high, 10, 8))
+
+        t_mode = diff & ((red < 0) | (red > 31))
+        h_mode = diff & ~t_mode & ((green < 0) | (green > 31))
+        planar = diff & ~t_mode & ~h_mode & ((blue < 0) | (blue > 31))
+
+        if t_mode.any():
+            h = high[t_mode]
+            color_1 = extend(np.stack((bits(h, 28, 27) << 2 | bits(h, 25, 24), bits(h, 23, 20), bits(h, 19, 16)), -1), 4)
+            color_2 = extend(np.stack((bits(h, 15, 12), bits(h, 11, 8), bits(h, 7, 4)), -1), 4)
+            distance = ETC2_DISTANCES[bits(h, 3, 2) << 1 | bits(h, 0, 0)][:, None]
+
+            paint = np.stack((color_1, color_2 + distance, color_2, color_2 - distance), 1)
+            palette[t_mode] = paint[:, None]
+            subblock[t_mode] = 0
+
+        if h_mode.any():
+            h = high[h_mode]
+            red_1, green_1 = bits(h, 30, 27), bits(h, 26, 24) << 1 | bits(h, 20, 20)
+            blue_1 = bits(h, 19, 19) << 3 | bits(h, 17, 15)
+            red_2, green_2, blue_2 = bits(h, 14, 11), bits(h, 10, 7), bits(h, 6, 3)
+
+            order = (red_1 << 8 | green_1 << 4 | blue_1) >= (red_2 << 8 | green_2 << 4 | blue_2)
+            distance = ETC2_DISTANCES[bits(h, 2, 2) << 2 | bits(h, 0, 0) << 1 | order][:, None]
+
+            color_1 = extend(np.stack((red_1, green_1, blue_1), -1), 4)
+            color_2 = extend(np.stack((red_2, green_2, blue_2), -1), 4)
+
+            paint = np.stack((color_1 + distance, color_1 - distance, color_2 + distance, color_2 - distance), 1)
+            palette[h_mode] = paint[:, None]
+            subblock[h_mode] = 0
+
+    palette = np.clip(palette, 0, 255)
+    pixels = palette[np.arange(count)[:, None], subblock, index]
+    alpha = np.full((count, 16, 1), 255, np.int64)
+
+    if punchthrough:
+        transparent = ~opaque[:, None] & (index == 2)
+        pixels[transparent] = 0
+        alpha[transparent] = 0
+
+    if not etc1 and planar.any():
+        h, l = high[planar], low[planar]
+        origin = np.stack((
+            extend(bits(h, 30, 25), 6),
+            extend(bits(h, 24, 24) << 6 | bits(h, 22, 17), 7),
+            extend(bits(h, 16, 16) << 5 | bits(h, 12, 11) << 3 | bits(h, 9, 7), 6)), -1)
+        horizontal = np.stack((
+            extend(bits(h, 6, 2) << 1 | bits(h, 0, 0), 6),
+            extend(bits(l, 31, 25), 7),
+            extend(bits(l, 24, 19), 6)), -1)
+        vertical = np.stack((
+            extend(bits(l, 18, 13), 6),
+            extend(bits(l, 12, 6), 7),
+            extend(bits(l, 5, 0), 6)), -1)
+
+        x, y = PIXEL_X[None, :, None], PIXEL_Y[None, :, None]
+        origin, horizontal, vertical = origin[:, None], horizontal[:, None], vertical[:, None]
+        pixels[planar] = np.clip((x * (horizontal - origin) + y * (vertical - origin) + 4 * origin + 2) >> 2, 0, 255)
+        alpha[planar] = 255
+
+    return np.concatenate((pixels, alpha), -1).astype(np.uint8)
+
+
+def decode_eac(block, eleven_bits: bool = False, signed: bool = False):
+    """Decodes 64 bit EAC blocks into (blocks, 16) values, 8 bit or 11 bit wide."""
+    base = (block >> np.uint64(56)).astype(np.int64)
+    multiplier = bits(block >> np.uint64(52), 3, 0).astype(np.int64)
+    table = bits(block >> np.uint64(48), 3, 0).astype(np.int64)
+
+    i = np.arange(16, dtype=np.uint64)
+    index = ((block[:, None] >> (np.uint64(45) - np.uint64(3) * i)) & np.uint64(7)).astype(np.int64)
+    modifier = EAC_MODIFIERS[table[:, None], index]
+
+    if not eleven_bits:
+        return np.clip(base[:, None] + modifier * multiplier[:, None], 0, 255)
+
+    scale = np.where(multiplier == 0, 1, multiplier * 8)[:, None]
+    if signed:
+        base = np.where(base >= 128, base - 256, base)
+        base = np.maximum(base, -127)
+        return np.clip(base[:, None] * 8 + modifier * scale, -1023, 1023)
+
+    return np.clip(base[:, None] * 8 + 4 + modifier * scale, 0, 2047)
+
+
+def eleven_to_eight(values, signed: bool = False):
+    if signed:
+        return (values + 1023) * 255 // 2046
+    return values >> 3
+
+
+def decode_in_chunks(decode, blocks):
+    """Runs a block decoder over slices of blocks so temporary arrays stay small."""
+    pixels = np.empty((len(blocks), 16, 4), np.uint8)
+    for start in range(0, len(blocks), CHUNK_BLOCKS):
+        pixels[start:start + CHUNK_BLOCKS] = decode(blocks[start:start + CHUNK_BLOCKS])
+    return pixels
+
+
+def decode_etc1(data, width, height):
+    blocks = read_blocks(data, width, height, 8)
+    pixels = decode_in_chunks(lambda chunk: decode_etc2_color(chunk[:, 0], etc1=True), blocks)
+    return blocks_to_image(pixels, width, height)
+
+
+def decode_etc2_rgb(data, width, height):
+    blocks = read_blocks(data, width, height, 8)
+    pixels = decode_in_chunks(lambda chunk: decode_etc2_color(chunk[:, 0]), blocks)
+    return blocks_to_image(pixels, width, height)
+
+
+def decode_etc2_rgb_a1(data, width, height):
+    blocks = read_blocks(data, width, height, 8)
+    pixels = decode_in_chunks(lambda chunk: decode_etc2_color(chunk[:, 0], punchthrough=True), blocks)
+    return blocks_to_image(pixels, width, height)
+
+
+def decode_etc2_eac_rgba8_blocks(blocks):
+    pixels = decode_etc2_color(blocks[:, 1])
+    pixels[:, :, 3] = decode_eac(blocks[:, 0])
+    return pixels
+
+
+def decode_etc2_eac_rgba8(data, width, height):
+    blocks = read_blocks(data, width, height, 16)
+    return blocks_to_image(decode_in_chunks(decode_etc2_eac_rgba8_blocks, blocks), width, height)
+
+
+def decode_eac_blocks(blocks, signed: bool = False):
+    """Decodes R11 (one column) or RG11 (two columns) blocks."""
+    pixels = np.zeros((len(blocks), 16, 4), np.uint8)
+    for channel in range(blocks.shape[1]):
+        pixels[:, :, channel] = eleven_to_eight(decode_eac(blocks[:, channel], True, signed), signed)
+    pixels[:, :, 3] = 255
+    return pixels
+
+
+def decode_eac_r11(data, width, height, signed: bool = False):
+    blocks = read_blocks(data, width, height, 8)
+    return blocks_to_image(decode_in_chunks(lambda chunk: decode_eac_blocks(chunk, signed), blocks), width, height)
+
+
+def decode_eac_rg11(data, width, height, signed: bool = False):
+    blocks = read_blocks(data, width, height, 16)
+    return blocks_to_image(decode_in_chunks(lambda chunk: decode_eac_blocks(chunk, signed), blocks), width, height)
+
+
+def decode_eac_signed_r11(data, width, height): return decode_eac_r11(data, width, height, True)
+
+def decode_eac_signed_rg11(data, width, height): return decode_eac_rg11(data, width, height, True)
+
+
+# Keyed by glInternalFormat, every decoder returns a (height, width, 4) RGBA array
+ETC_DECODERS = {
+    0x8D64: decode_etc1,
+    0x9270: decode_eac_r11,
+    0x9271: decode_eac_signed_r11,
+    0x9272: decode_eac_rg11,
+    0x9273: decode_eac_signed_rg11,
+    0x9274: decode_etc2_rgb,
+    0x9275: decode_etc2_rgb,
+    0x9276: decode_etc2_rgb_a1,
+    0x9277: decode_etc2_rgb_a1,
+    0x9278: decode_etc2_eac_rgba8,
+    0x9279: decode_etc2_eac_rgba8,
+}
@@ -0,0 +1,48 @@
+import struct
+
+import numpy as np
+from PIL import Image
+
+from lib.sc.streaming.astc import ASTC_DECODERS
+from lib.sc.streaming.etc import ETC_DECODERS
+
+# Keyed by glInternalFormat, every decoder returns a (height, width, 4) RGBA array
+KHRONOS_DECODERS = {**ETC_DECODERS, **ASTC_DECODERS}
+
+
+class KhronosTexture:
+    IDENTIFIER = b"\xabKTX 11\xbb\r\n\x1a\n"
+    ENDIANNESS = 0x04030201
+
+    def __init__(self, data) -> None:
+        data = memoryview(data)
+        if bytes(data[:12]) != KhronosTexture.IDENTIFIER:
+            raise ValueError("Bad KTX file magic")
+
+        endian = "<" if struct.unpack_from("<I", data, 12)[0] == KhronosTexture.ENDIANNESS else ">"
+
+        (self.gl_type,
+         self.gl_type_size,
+         self.gl_format,
+         self.gl_internal_format,
+         self.gl_base_internal_format,
+         self.width,
+         self.height,
+         self.depth,
+         self.array_elements_count,
+         self.faces_count,
+         self.mipmap_levels_count,
+         key_value_data_length) = struct.unpack_from(f"{endian}12I", data, 16)
+
+        # Only the first mipmap level is used
+        offset = 64 + key_value_data_length
+        image_size = struct.unpack_from(f"{endian}I", data, offset)[0]
+        self.data = data[offset + 4:offset + 4 + image_size]
+
+    @property
+    def supported(self) -> bool:
+        return self.gl_internal_format in KHRONOS_DECODERS
+
+    def decode(self) -> Image:
+        pixels = KHRONOS_DECODERS[self.gl_internal_format](self.data, self.width, self.height)
+        return Image.frombuffer("RGBA", (self.width, self.height), np.ascontiguousarray(pixels), "raw", "RGBA", 0, 1)
@@ -53,11 +53,11 @@ class ScPixel(IntEnum):
     def glInternalFormat(pixel_type):
         # Dictionary-basiertes Lookup (kompatibel mit Python < 3.10)
         format_map = {
-            ScPixel.ETC1_RGB8: 0x648d,
+            ScPixel.ETC1_RGB8: 0x8D64,
             
             # ETC2 / EAC
             ScPixel.EAC_R11: 0x9270,
-            ScPixel.EAC_SIGNED_R11: 0x9273,
+            ScPixel.EAC_SIGNED_R11: 0x9271,
             ScPixel.EAC_RG11: 0x9272,
             ScPixel.EAC_SIGNED_RG11: 0x9273,
             ScPixel.ETC2_EAC_RGBA8: 0x9278,
@@ -1,5 +1,8 @@
 from lib.utils.reader import BinaryReader
 from lib.sc.streaming.scPixel import ScPixel
+from lib.sc.streaming.ktx import KHRONOS_DECODERS
+from PIL import Image
+import numpy as np
 import zstandard
 import io
 
@@ -10,7 +13,14 @@ class Texture:
         self.data_length: int = 0
         self.data: bytes = None
         self.pixel_type: ScPixel = pixel
-        
+
+    @property
+    def supported(self) -> bool:
+        return ScPixel.glInternalFormat(self.pixel_type) in KHRONOS_DECODERS
+
+    def decode(self) -> Image:
+        pixels = KHRONOS_DECODERS[ScPixel.glInternalFormat(self.pixel_type)](self.data, self.width, self.height)
+        return Image.frombuffer("RGBA", (self.width, self.height), np.ascontiguousarray(pixels), "raw", "RGBA", 0, 1)
 
 
 class SCTX:
@@ -40,7 +50,7 @@ class SCTX:
         data = reader.read(data_length)
         
         self.read_texture(data)
-        self.texture.data = reader.read(self.texture.data_length)
+        self.texture.data = reader.read_view(self.texture.data_length)
     
     def read_streaming_data(self, data: bytes):
         reader = BinaryReader(data)
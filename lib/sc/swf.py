@@ -1,9 +1,14 @@
 import copy
+import glob
 import os
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
 
-from ..utils import BinaryReader, BinaryWriter
+from ..utils import BinaryReader, BinaryWriter, load_compressed, load_compressed_head
 
 
+from .tag_index import TagIndex
+from lib.cache import SWFCache, get_swf_cache
 from .texture import SWFTexture
 from .shape import Shape
 from .text_field import TextField
@@ -11,7 +16,7 @@ from .matrix_bank import MatrixBank, Matrix
 from .movieclip import MovieClipModifier, MovieClip
 
 from sc_compression.signatures import Signatures
-from sc_compression import Decompressor, Compressor
+from sc_compression import Compressor
 
 from lib.console import Console
 class SupercellSWF:
@@ -27,6 +32,8 @@ class SupercellSWF:
     USE_UNCOMMON_RESOLUTION_TAG = 30
     TEXTURE_POSTFIXS_TAG = 32
 
+    TEXTURE_FLAG_TAGS = (USE_LOWRES_TEXTURE_TAG, USE_EXTERNAL_TEXTURE_TAG, USE_UNCOMMON_RESOLUTION_TAG, TEXTURE_POSTFIXS_TAG)
+
     MOVIECLIP_MODIFIERS_COUNT_TAG = 37
     MOVIECLIP_MODIFIER_TAGS = (38, 39, 40)
 
@@ -42,6 +49,17 @@ class SupercellSWF:
 
     MOVIECLIP_TAGS = (3, 10, 12, 14, 35, 49)
 
+    RESOURCE_TAGS = (*MOVIECLIP_MODIFIER_TAGS, *SHAPE_TAGS, *TEXT_FIELD_TAGS, *MOVIECLIP_TAGS)
+
+    # Decompressed bytes read by load_header_only at first, grown until the header fits
+    HEADER_READ_SIZE = 1 << 14
+
+    # Has to be increased whenever parsed objects change, older SWFCache entries are ignored then
+    CACHE_VERSION = 2
+
+    # Left out of SWFCache snapshots, textures are stored separately from their payloads
+    TRANSIENT_ATTRIBUTES = ("filename", "eager_textures", "workers", "textures", "tag_index", "reader", "writer")
+
     def __init__(self) -> None:
         self.filename: str = None
 
@@ -62,23 +80,50 @@ class SupercellSWF:
 
         self.exports: dict = {}
 
+        # Offsets of all tags in the main asset file, see load_index and load_resource
+        self.tag_index: TagIndex = None
+
         self.highres_texture_postfix: str = "_highres"
         self.lowres_texture_postfix: str = "_lowres"
         
         self.streaming_lowres_id = 0xFF
         self.streaming_id = 0xFF
 
+        # Shape sprites are extracted in a process pool when greater than 1, see sc_import.extract_sprites
+        self.workers: int = 1
+
+        # Raw textures are decoded on first SWFTexture.get_image() call unless requested,
+        # KTX / SCTX textures are decoded together right after loading
+        self.eager_textures: bool = False
+
         self.reader: BinaryReader = None
         self.writer: BinaryWriter = None
     
-    def load(self, filepath: str):
+    def load(self, filepath: str, eager_textures: bool = False, decode: bool = True, workers: int = 1):
         Console.info(f"Reading {filepath} SupercellFlash asset file...")
         print()
 
         self.filename = filepath
+        self.eager_textures = eager_textures
+        self.workers = min(workers, os.cpu_count() or 1)
+
+        cache = get_swf_cache()
+        key = SWFCache.key(self.source_files(), SupercellSWF.CACHE_VERSION) if cache.enabled else None
 
-        self.load_internal(filepath, False)
+        if key is None or not self.restore(cache.get(key)):
+            self.load_internal(filepath, False)
+            self.load_external_textures()
+
+            if key is not None:
+                cache.put(key, *self.snapshot())
+        else:
+            Console.info(f"Restored {filepath} from the parsed file cache.")
 
+        # Tool based decodes are slow, so they run together right after parsing
+        if decode:
+            self.decode_textures(None if self.eager_textures else [texture for texture in self.textures if texture.is_external])
+
+    def load_external_textures(self):
         if self.has_external_texture:
             texture_filename = os.path.splitext(self.filename)[0] + self.TEXTURE_EXTENSION
             highres_path = f"{os.path.splitext(self.filename)[0]}{self.highres_texture_postfix}{self.TEXTURE_EXTENSION}"
@@ -108,40 +153,102 @@ class SupercellSWF:
                     Console.error(f"Cannot find external texture file {texture_filename} for {self.filename}! Textures not loaded! Aborting...")
                     raise TypeError()
 
+    def source_files(self) -> list:
+        """The main asset file and all texture asset files that may be loaded with it.
+        Texture postfixes are only known once the header is read, so every postfixed texture file is included."""
+        base = glob.escape(os.path.splitext(self.filename)[0])
+        return [self.filename] + sorted(path for path in glob.glob(f"{base}*{self.TEXTURE_EXTENSION}") if os.path.isfile(path))
 
+    def snapshot(self) -> tuple:
+        """Picklable state of a loaded file and the texture payloads it refers to, see SWFCache."""
+        state = {name: value for name, value in vars(self).items() if name not in SupercellSWF.TRANSIENT_ATTRIBUTES}
 
-    def load_internal(self, filepath: str, is_texture: bool):
-        with open(filepath, 'rb') as file:
-            compressed = file.read().split(b"START")[0] # TODO: Vorono4ka, fix your sc-compression please...
+        directory = os.path.dirname(self.filename)
+        state["textures"] = []
+        payloads = []
+        offset = 0
+        for texture in self.textures:
+            attributes = {name: value for name, value in vars(texture).items() if name not in ("_image", "_pixels", "_decode_failed", "data")}
+            if texture.external_path is not None:
+                attributes["external_path"] = os.path.relpath(texture.external_path, directory)
+
+            payload = None
+            if texture.data is not None:
+                payload = (offset, len(texture.data))
+                payloads.append(texture.data)
+                offset += len(texture.data)
+
+            state["textures"].append((attributes, payload))
+
+        return state, payloads
+
+    def restore(self, cached: tuple) -> bool:
+        """Restores a snapshot taken by snapshot(), texture payloads stay in the cache file until decoded."""
+        if cached is None:
+            return False
+
+        state, payloads = cached
+        textures = state.pop("textures")
+        vars(self).update(state)
+
+        directory = os.path.dirname(self.filename)
+        self.textures = []
+        for attributes, payload in textures:
+            texture = SWFTexture()
+            vars(texture).update(attributes)
+            if texture.external_path is not None:
+                texture.external_path = os.path.join(directory, texture.external_path)
+
+            if payload is not None:
+                offset, length = payload
+                texture.data = payloads[offset:offset + length]
+
+            self.textures.append(texture)
+
+        return True
+
+    def find_exports(self, patterns: list) -> list:
+        """Ids of exports with a name matching any of the fnmatch patterns."""
+        return [id for id, names in self.exports.items()
+                if any(fnmatchcase(name, pattern) for name in names for pattern in patterns)]
+
+    def dependencies(self, ids) -> set:
+        """Resource ids reachable from the given resources through movieclip binds, including themselves."""
+        closure = set()
+        pending = list(ids)
+        while pending:
+            id = pending.pop()
+            if id in closure or id not in self.resources:
+                continue
 
-            decompressor = Decompressor()
-            self.reader = BinaryReader(decompressor.decompress(compressed))
+            closure.add(id)
+            resource = self.resources[id]
+            if isinstance(resource, MovieClip):
+                pending.extend(bind["id"] for bind in resource.binds)
 
-        if not is_texture:
-            Console.info("Reading main asset file...")
+        return closure
 
-            self.shapes_count = self.reader.read_ushort()
-            self.movieclips_count = self.reader.read_ushort()
-            self.textures_count = self.reader.read_ushort()
-            self.text_fields_count = self.reader.read_ushort()
+    def decode_textures(self, textures: list = None):
+        """Decodes textures that are not decoded yet in a pool of one worker per CPU core.
+        Failed decodes are only reported by get_image, once the texture is actually used."""
+        pending = [texture for texture in (self.textures if textures is None else textures) if texture.is_pending]
+        if not pending:
+            return
 
-            self.matrix_banks[-1].load(self)
+        workers = min(len(pending), os.cpu_count() or 1)
+        Console.info(f"Decoding {len(pending)} textures with {workers} workers...")
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(SWFTexture.decode, pending))
 
-            self.reader.skip(5)  # unused
 
-            exports_count = self.reader.read_ushort()
+    def load_internal(self, filepath: str, is_texture: bool):
+        self.reader = BinaryReader(load_compressed(filepath))
 
-            export_ids = [self.reader.read_ushort() for x in range(exports_count)]
-            self.exports = {id: [] for id in export_ids}
-            
-            for export_id in export_ids:
-                export_name = self.reader.read_ascii()
+        if not is_texture:
+            Console.info("Reading main asset file...")
 
-                self.exports[export_id].append(export_name)
-            
-            print()
-            
-            self.textures = [_class() for _class in [SWFTexture] * self.textures_count]
+            self.load_header()
+            self.tag_index = TagIndex.build(self.reader.view, self.reader.tell(), SupercellSWF.RESOURCE_TAGS)
         
         else:
             Console.info("Reading external texture asset file...")
@@ -149,6 +256,195 @@ class SupercellSWF:
 
         self.load_tags()
 
+    def load_header(self):
+        self.read_header()
+        print()
+
+    def read_header(self):
+        self.shapes_count = self.reader.read_ushort()
+        self.movieclips_count = self.reader.read_ushort()
+        self.textures_count = self.reader.read_ushort()
+        self.text_fields_count = self.reader.read_ushort()
+
+        self.matrix_banks[-1].load(self)
+
+        self.reader.skip(5)  # unused
+
+        exports_count = self.reader.read_ushort()
+
+        export_ids = [self.reader.read_ushort() for x in range(exports_count)]
+        self.exports = {id: [] for id in export_ids}
+        
+        for export_id in export_ids:
+            export_name = self.reader.read_ascii()
+
+            self.exports[export_id].append(export_name)
+        
+        self.textures = [_class() for _class in [SWFTexture] * self.textures_count]
+
+    def load_header_only(self, filepath: str):
+        """Reads the header and the texture flag tags following it from the first decompressed bytes
+        of a main asset file, the rest of the file is neither read nor decompressed."""
+        self.filename = filepath
+
+        size = SupercellSWF.HEADER_READ_SIZE
+        while True:
+            data = load_compressed_head(filepath, size)
+            self.reader = BinaryReader(data)
+            self.matrix_banks = [MatrixBank()]
+
+            self.read_header()
+            complete = self.read_texture_flags()
+
+            # The header may be longer than what was decompressed with many exports
+            if complete or len(data) < size:
+                break
+            size *= 4
+
+        self.reader = None
+
+    def read_texture_flags(self) -> bool:
+        """Reads the texture flag tags at the beginning of the tag stream, False if the data ended before another tag."""
+        self.has_external_texture = False
+        while True:
+            if self.reader.tell() + 5 > len(self.reader.view):
+                return False
+
+            tag = self.reader.read_uchar()
+            tag_length = self.reader.read_int()
+            if tag not in SupercellSWF.TEXTURE_FLAG_TAGS:
+                return True
+
+            if self.reader.tell() + tag_length > len(self.reader.view):
+                return False
+
+            if tag == SupercellSWF.USE_LOWRES_TEXTURE_TAG:
+                self.use_lowres_texture = True
+
+            elif tag == SupercellSWF.USE_EXTERNAL_TEXTURE_TAG:
+                self.has_external_texture = True
+
+            elif tag == SupercellSWF.USE_UNCOMMON_RESOLUTION_TAG:
+                self.use_uncommon_texture = True
+                self.use_lowres_texture = True
+
+            elif tag == SupercellSWF.TEXTURE_POSTFIXS_TAG:
+                self.highres_texture_postfix = self.reader.read_ascii()
+                self.lowres_texture_postfix = self.reader.read_ascii()
+
+    def info(self) -> dict:
+        """Summary of a loaded header, see load_header_only."""
+        return {
+            "file": os.path.basename(self.filename),
+            "shapes": self.shapes_count,
+            "movieclips": self.movieclips_count,
+            "textures": self.textures_count,
+            "text_fields": self.text_fields_count,
+            # Only the first matrix bank is declared in the header, further banks follow at the end of the tags
+            "matrices": len(self.matrix_banks[0].matrices),
+            "color_transforms": len(self.matrix_banks[0].color_transforms),
+            "exports": {name: id for id, names in self.exports.items() for name in names if name is not None},
+            "external_texture": self.has_external_texture,
+            "lowres_texture": self.use_lowres_texture,
+            "uncommon_texture": self.use_uncommon_texture,
+            "highres_texture_postfix": self.highres_texture_postfix,
+            "lowres_texture_postfix": self.lowres_texture_postfix
+        }
+
+    def load_index(self, filepath: str, save: bool = True):
+        """Reads the header, the tag index and the matrix banks of a main asset file without parsing any resource tags,
+        resources are then loaded one by one with load_resource."""
+        Console.info(f"Indexing {filepath} SupercellFlash asset file...")
+
+        self.filename = filepath
+        self.reader = BinaryReader(load_compressed(filepath))
+        self.load_header()
+
+        self.tag_index = TagIndex.load(filepath)
+        if self.tag_index is None:
+            self.tag_index = TagIndex.build(self.reader.view, self.reader.tell(), SupercellSWF.RESOURCE_TAGS)
+            if save and not self.tag_index.save(filepath):
+                Console.warning(f"Cannot save the tag index of {filepath}, it is rebuilt on the next load.")
+
+        # Movieclips refer to matrices and color transforms by index, so the banks are needed for any of them
+        self.load_matrix_banks()
+
+        return self.tag_index
+
+    def load_matrix_banks(self):
+        """Loads the matrices and color transforms of all banks through the tag index,
+        records that directly follow each other are read in bulk like in load_tags."""
+        matrices_loaded = 0
+        color_transforms_loaded = 0
+
+        position = 0
+        for entry in self.tag_index.find((SupercellSWF.MATRIX_BANK_TAG, *SupercellSWF.MATRIX_TAGS, SupercellSWF.COLOR_TRANSFORM_TAG)):
+            if entry.offset < position:
+                continue  # already read together with a previous record
+
+            self.reader.seek(entry.offset)
+            if entry.tag == SupercellSWF.MATRIX_BANK_TAG:
+                matrix_bank = MatrixBank()
+                matrix_bank.index = len(self.matrix_banks)
+                matrix_bank.load(self)
+                self.matrix_banks.append(matrix_bank)
+
+                matrices_loaded = 0
+                color_transforms_loaded = 0
+
+            elif entry.tag in SupercellSWF.MATRIX_TAGS:
+                matrices_loaded += self.matrix_banks[-1].load_matrices(self, matrices_loaded)
+
+            else:
+                color_transforms_loaded += self.matrix_banks[-1].load_color_transforms(self, color_transforms_loaded)
+
+            position = self.reader.tell()
+
+    def load_resource(self, id: int):
+        """Parses a single shape, text field, movieclip or movieclip modifier through the tag index."""
+        if id in self.resources:
+            return self.resources[id]
+
+        entry = self.tag_index.resources.get(id)
+        if entry is None:
+            Console.error(f"Resource {id} not found in {self.filename}! Aborting...")
+            raise TypeError()
+
+        if entry.tag in SupercellSWF.SHAPE_TAGS:
+            self.load_texture_headers()  # bitmap uv coords depend on texture sizes
+
+        resource = SupercellSWF.resource_class(entry.tag)()
+        self.reader.seek(entry.offset)
+        resource.load(self, entry.tag)
+
+        self.resources[id] = resource
+        return resource
+
+    @staticmethod
+    def resource_class(tag: int):
+        if tag in SupercellSWF.MOVIECLIP_MODIFIER_TAGS:
+            return MovieClipModifier
+        if tag in SupercellSWF.SHAPE_TAGS:
+            return Shape
+        if tag in SupercellSWF.TEXT_FIELD_TAGS:
+            return TextField
+        return MovieClip
+
+    def load_texture_headers(self):
+        has_external_texture = False
+        textures_loaded = 0
+        for entry in self.tag_index.find((SupercellSWF.USE_EXTERNAL_TEXTURE_TAG, *SupercellSWF.TEXTURE_TAGS)):
+            if entry.tag == SupercellSWF.USE_EXTERNAL_TEXTURE_TAG:
+                has_external_texture = True
+                continue
+
+            texture = self.textures[textures_loaded]
+            if not texture.width:
+                self.reader.seek(entry.offset)
+                texture.load(self, entry.tag, has_external_texture)
+
+            textures_loaded += 1
+
     def load_tags(self):
         has_external_texture = False
 
@@ -261,22 +557,18 @@ class SupercellSWF:
                 continue
 
             elif tag in SupercellSWF.MATRIX_TAGS:
-                Console.progress_bar("Matrices loading...", matrices_loaded, self.matrix_banks[-1].matrices_count)
+                matrices_loaded += self.matrix_banks[-1].load_matrices(self, matrices_loaded)
+                Console.progress_bar("Matrices loading...", matrices_loaded - 1, self.matrix_banks[-1].matrices_count)
 
-                self.matrix_banks[-1].matrices[matrices_loaded].load(self, tag)
-
-                matrices_loaded += 1
                 if matrices_loaded == self.matrix_banks[-1].matrices_count:
                     print()
                 
                 continue
 
             elif tag == SupercellSWF.COLOR_TRANSFORM_TAG:
-                Console.progress_bar("ColorTransforms loading...", color_transforms_loaded, self.matrix_banks[-1].color_transforms_count)
-
-                self.matrix_banks[-1].color_transforms[color_transforms_loaded].load(self, tag)
+                color_transforms_loaded += self.matrix_banks[-1].load_color_transforms(self, color_transforms_loaded)
+                Console.progress_bar("ColorTransforms loading...", color_transforms_loaded - 1, self.matrix_banks[-1].color_transforms_count)
 
-                color_transforms_loaded += 1
                 if color_transforms_loaded == self.matrix_banks[-1].color_transforms_count:
                     print()
                 
@@ -493,25 +785,19 @@ class SupercellSWF:
                     print()
 
             elif isinstance(resource, MatrixBank):
-                written_transforms = 0
                 if resource.index > 0:
                     tag, data = resource.save()
                     save_tag(tag, data)
 
-                for matrix in resource.matrices:
-                    Console.progress_bar(f"Matrices bank {resource.index} writing...", written_transforms, len(resource.matrices))
-
-                    matrix.save(self)
-
-                    written_transforms += 1
+                resource.save_matrices(self)
+                if resource.matrices:
+                    Console.progress_bar(f"Matrices bank {resource.index} writing...", len(resource.matrices) - 1, len(resource.matrices))
                 print()
-                written_transforms = 0
-                for color_transform in resource.color_transforms:
-                    Console.progress_bar(f"Colors bank {resource.index} writing...", written_transforms,
-                                         len(resource.color_transforms))
-                    color_transform.save(self)
 
-                    written_transforms += 1
+                resource.save_color_transforms(self)
+                if resource.color_transforms:
+                    Console.progress_bar(f"Colors bank {resource.index} writing...", len(resource.color_transforms) - 1,
+                                         len(resource.color_transforms))
                 print()
             
             elif isinstance(resource, MovieClip):
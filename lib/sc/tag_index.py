@@ -0,0 +1,82 @@
+import os
+import json
+import struct
+from typing import NamedTuple, Optional
+
+
+class TagEntry(NamedTuple):
+    tag: int
+    offset: int  # payload offset in the decompressed file
+    length: int
+    resource_id: Optional[int]
+
+
+class TagIndex:
+    """Offsets of all top-level tags of a decompressed .sc file, built from the tag headers only."""
+
+    VERSION = 1
+    EXTENSION = ".index.json"
+
+    def __init__(self, entries: list = None) -> None:
+        self.entries: list = entries or []
+        self.resources: dict = {entry.resource_id: entry for entry in self.entries if entry.resource_id is not None}
+
+    @staticmethod
+    def build(data: memoryview, offset: int, resource_tags: tuple):
+        """Walks the tag headers from `offset` to the end tag, payloads are skipped."""
+        entries = []
+        while offset + 5 <= len(data):
+            tag, length = struct.unpack_from("<Bi", data, offset)
+            offset += 5
+
+            if tag == 0:
+                break
+
+            resource_id = None
+            if tag in resource_tags and length >= 2:
+                resource_id = struct.unpack_from("<H", data, offset)[0]
+
+            entries.append(TagEntry(tag, offset, length, resource_id))
+            offset += length
+
+        return TagIndex(entries)
+
+    def find(self, tags: tuple) -> list:
+        return [entry for entry in self.entries if entry.tag in tags]
+
+    @staticmethod
+    def path(filepath: str) -> str:
+        return filepath + TagIndex.EXTENSION
+
+    @staticmethod
+    def stamp(filepath: str) -> list:
+        stat = os.stat(filepath)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def save(self, filepath: str) -> bool:
+        """Saves the index next to the .sc file it was built from, False if it cannot be written there."""
+        try:
+            with open(TagIndex.path(filepath), "w") as f:
+                json.dump({
+                    "version": TagIndex.VERSION,
+                    "source": TagIndex.stamp(filepath),
+                    "entries": self.entries
+                }, f, separators=(",", ":"))
+        except OSError:
+            return False
+
+        return True
+
+    @staticmethod
+    def load(filepath: str):
+        """Loads the saved index of a .sc file, None if there is none or the file has changed since."""
+        try:
+            with open(TagIndex.path(filepath)) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != TagIndex.VERSION or data.get("source") != TagIndex.stamp(filepath):
+            return None
+
+        return TagIndex([TagEntry(*entry) for entry in data["entries"]])
@@ -2,15 +2,19 @@ from .writable import Writable
 import tempfile
 import os
 from PIL import Image
+import numpy as np
 import colorama
 import zstandard
 import io
+import struct
 import subprocess
 from lib.utils.reader import BinaryReader
 from lib.utils.writer import BinaryWriter
 from lib.sc.streaming.sctx import SCTX
 from lib.sc.streaming.scPixel import ScPixel
+from lib.sc.streaming.ktx import KhronosTexture
 from lib.console import Console
+from lib.cache import get_texture_cache
 
 # Neue Imports für plattformübergreifende Tool-Ausführung
 from lib.platform_detect import detect_os, OperatingSystem, is_wine_available
@@ -67,56 +71,110 @@ PIXEL_INTERNAL_FORMATS = [
     "GL_RGBA4", "GL_LUMINANCE8"
 ]
 
-def read_rgba8(swf): return tuple(swf.reader.read_uchar() for _ in range(4))
+def decode_rgba8(data): return np.frombuffer(data, np.uint8).reshape(-1, 4)
 
-def read_rgba4(swf):
-    p = swf.reader.read_ushort()
-    return ((p >> 12) & 15) << 4, ((p >> 8) & 15) << 4, ((p >> 4) & 15) << 4, (p & 15) << 4
+def decode_rgba4(data):
+    p = np.frombuffer(data, "<u2")
+    return (np.stack((p >> 12, p >> 8, p >> 4, p), -1) & 15).astype(np.uint8) << 4
 
-def read_rgb5_a1(swf):
-    p = swf.reader.read_ushort()
-    return ((p >> 11) & 31) << 3, ((p >> 6) & 31) << 3, ((p >> 1) & 31) << 3, (p & 255) << 7
+def decode_rgb5_a1(data):
+    p = np.frombuffer(data, "<u2")
+    # alpha keeps the historical (p & 255) << 7 expansion, saturated like PIL pixel access did
+    return np.stack(((p >> 11 & 31) << 3, (p >> 6 & 31) << 3, (p >> 1 & 31) << 3, np.minimum((p & 255) << 7, 255)), -1).astype(np.uint8)
 
-def read_rgb565(swf):
-    p = swf.reader.read_ushort()
-    return ((p >> 11) & 31) << 3, ((p >> 5) & 63) << 2, (p & 31) << 3
+def decode_rgb565(data):
+    p = np.frombuffer(data, "<u2")
+    return np.stack(((p >> 11 & 31) << 3, (p >> 5 & 63) << 2, (p & 31) << 3), -1).astype(np.uint8)
 
-def read_luminance8_alpha8(swf):
-    return swf.reader.read_uchar(), swf.reader.read_uchar()
+def decode_luminance8_alpha8(data): return np.frombuffer(data, np.uint8).reshape(-1, 2)
 
-def read_luminance8(swf):
-    return swf.reader.read_uchar()
+def decode_luminance8(data): return np.frombuffer(data, np.uint8).reshape(-1, 1)
 
-def write_rgba8(swf, p): [swf.write_uchar(c) for c in p]
+def encode_rgba8(p): return p
 
-def write_rgba4(swf, p): swf.write_ushort(p[3] >> 4 | p[2] >> 4 << 4 | p[1] >> 4 << 8 | p[0] >> 4 << 12)
+def encode_rgba4(p):
+    p = p.astype("<u2") >> 4
+    return p[:, 3] | p[:, 2] << 4 | p[:, 1] << 8 | p[:, 0] << 12
 
-def write_rgb5_a1(swf, p): swf.write_ushort(p[3] >> 7 | p[2] >> 3 << 1 | p[1] >> 3 << 6 | p[0] >> 3 << 11)
+def encode_rgb5_a1(p):
+    p = p.astype("<u2")
+    return p[:, 3] >> 7 | p[:, 2] >> 3 << 1 | p[:, 1] >> 3 << 6 | p[:, 0] >> 3 << 11
 
-def write_rgb565(swf, p): swf.write_ushort(int(p[2] >> 3 | p[1] >> 2 << 5 | p[0] >> 3 << 11))
+def encode_rgb565(p):
+    p = p.astype("<u2")
+    return p[:, 2] >> 3 | p[:, 1] >> 2 << 5 | p[:, 0] >> 3 << 11
 
-def write_luminance8_alpha8(swf, p): swf.write_ushort(p[0] << 8 | p[1])
+def encode_luminance8_alpha8(p):
+    p = p.astype("<u2")
+    return p[:, 0] << 8 | p[:, 1]
 
-def write_luminance8(swf, p): swf.write_uchar(int(p))
+def encode_luminance8(p): return p
 
-PIXEL_READ_FUNCTIONS = {
-    "GL_RGBA8": read_rgba8,
-    "GL_RGBA4": read_rgba4,
-    "GL_RGB5_A1": read_rgb5_a1,
-    "GL_RGB565": read_rgb565,
-    "GL_LUMINANCE8_ALPHA8": read_luminance8_alpha8,
-    "GL_LUMINANCE8": read_luminance8
+PIXEL_DECODE_FUNCTIONS = {
+    "GL_RGBA8": decode_rgba8,
+    "GL_RGBA4": decode_rgba4,
+    "GL_RGB5_A1": decode_rgb5_a1,
+    "GL_RGB565": decode_rgb565,
+    "GL_LUMINANCE8_ALPHA8": decode_luminance8_alpha8,
+    "GL_LUMINANCE8": decode_luminance8
 }
 
-PIXEL_WRITE_FUNCTIONS = {
-    "GL_RGBA8": write_rgba8,
-    "GL_RGBA4": write_rgba4,
-    "GL_RGB5_A1": write_rgb5_a1,
-    "GL_RGB565": write_rgb565,
-    "GL_LUMINANCE8_ALPHA8": write_luminance8_alpha8,
-    "GL_LUMINANCE8": write_luminance8
+PIXEL_SIZES = {
+    "GL_RGBA8": 4,
+    "GL_RGBA4": 2,
+    "GL_RGB5_A1": 2,
+    "GL_RGB565": 2,
+    "GL_LUMINANCE8_ALPHA8": 2,
+    "GL_LUMINANCE8": 1
 }
 
+PIXEL_ENCODE_FUNCTIONS = {
+    "GL_RGBA8": encode_rgba8,
+    "GL_RGBA4": encode_rgba4,
+    "GL_RGB5_A1": encode_rgb5_a1,
+    "GL_RGB565": encode_rgb565,
+    "GL_LUMINANCE8_ALPHA8": encode_luminance8_alpha8,
+    "GL_LUMINANCE8": encode_luminance8
+}
+
+TEXTURE_BLOCK_SIZE = 32
+
+def _block_regions(stream, image, block):
+    """Pairs of (stream, image) views over the full tiles, the right edge column,
+    the bottom edge row and the corner, shaped (bands, tiles, rows, cols, channels)
+    and (bands, rows, tiles, cols, channels) respectively."""
+    height, width, channels = image.shape
+    full_h, full_w = height - height % block, width - width % block
+    rest_h, rest_w = height - full_h, width - full_w
+    bands, tiles = full_h // block, full_w // block
+
+    banded = stream[:full_h * width].reshape(bands, block * width, channels)
+    yield (banded[:, :block * full_w].reshape(bands, tiles, block, block, channels),
+           image[:full_h, :full_w].reshape(bands, block, tiles, block, channels))
+    yield (banded[:, block * full_w:].reshape(bands, 1, block, rest_w, channels),
+           image[:full_h, full_w:].reshape(bands, block, 1, rest_w, channels))
+
+    tail = stream[full_h * width:]
+    yield (tail[:rest_h * full_w].reshape(1, tiles, rest_h, block, channels),
+           image[full_h:, :full_w].reshape(1, rest_h, tiles, block, channels))
+    yield (tail[rest_h * full_w:].reshape(1, 1, rest_h, rest_w, channels),
+           image[full_h:, full_w:].reshape(1, rest_h, 1, rest_w, channels))
+
+def untile_pixels(pixels, width, height, block=TEXTURE_BLOCK_SIZE):
+    """Reorders a stream of pixels stored in block x block tiles (edge tiles are cut to the texture size) into rows."""
+    image = np.empty((height, width, pixels.shape[-1]), pixels.dtype)
+    for stream_region, image_region in _block_regions(pixels, image, block):
+        image_region[...] = stream_region.transpose(0, 2, 1, 3, 4)
+    return image.reshape(-1, pixels.shape[-1])
+
+def tile_pixels(pixels, width, height, block=TEXTURE_BLOCK_SIZE):
+    """Inverse of untile_pixels."""
+    stream = np.empty_like(pixels)
+    image = pixels.reshape(height, width, pixels.shape[-1])
+    for stream_region, image_region in _block_regions(stream, image, block):
+        stream_region[...] = image_region.transpose(0, 2, 1, 3, 4)
+    return stream
+
 def get_aligned_bytes_position(pos): return pos if pos % 16 == 0 else (pos // 16 + 1) * 16
 
 class SWFTexture(Writable):
@@ -132,18 +190,38 @@ class SWFTexture(Writable):
         self.width = 0
         self.height = 0
         self._image = None
+        self._pixels = None
+        # Set when the source could not be decoded, the decode is not tried again
+        self._decode_failed = False
+
+        # Where the encoded texture lives, decoded on the first get_image() call
+        self.data: memoryview = None
+        self.data_length: int = 0
+        self.is_khronos: bool = False
+        self.external_path: str = None
 
     def load_khronos_texture(self, data):
-        """Lädt KTX-Texturen mit PVRTexToolCLI (plattformübergreifend)"""
-        inputPath = os.path.join(tempfile.gettempdir(), next(tempfile._get_candidate_names()) + ".ktx")
-        outputPath = os.path.join(tempfile.gettempdir(), next(tempfile._get_candidate_names()) + ".png")
-        
-        with open(inputPath, "wb") as f: 
+        """Lädt KTX-Texturen direkt (ETC1/ETC2/EAC/ASTC), andere Formate mit PVRTexToolCLI (plattformübergreifend)"""
+        try:
+            khronos_texture = KhronosTexture(data)
+            if khronos_texture.supported:
+                self._image = khronos_texture.decode()
+                return
+        except (ValueError, struct.error) as e:
+            Console.warning(f"Cannot decode KTX texture in-process ({e}), falling back to PVRTexToolCLI...")
+
+        # Unique temp files, textures may be decoded from several threads at once
+        input_fd, inputPath = tempfile.mkstemp(suffix=".ktx")
+        output_fd, outputPath = tempfile.mkstemp(suffix=".png")
+        os.close(output_fd)
+
+        with os.fdopen(input_fd, "wb") as f:
             f.write(data)
         
         try:
             run_pvr_tex_tool(inputPath, outputPath)
             self._image = Image.open(outputPath)
+            self._image.load()
             
             # Cleanup temp files
             try:
@@ -168,8 +246,17 @@ class SWFTexture(Writable):
             return
 
     def load_sctx_texture(self, path, externalTextureFilepath):
-        """Lädt SCTX-Texturen mit SctxConverter (plattformübergreifend)"""
+        """Lädt SCTX-Texturen direkt (ETC/ASTC), sonst mit SctxConverter (plattformübergreifend)"""
         print(colorama.Fore.LIGHTMAGENTA_EX + "[INFO] Extracting External Asset Texture:", externalTextureFilepath)
+
+        try:
+            texture = SCTX(path).texture
+            if texture.supported:
+                self._image = texture.decode()
+                return
+        except (ValueError, struct.error) as e:
+            Console.warning(f"Cannot decode SCTX texture in-process ({e}), falling back to SctxConverter...")
+
         out = path.replace("sctx", "png")
         
         try:
@@ -212,52 +299,97 @@ class SWFTexture(Writable):
         self.width = swf.reader.read_ushort()
         self.height = swf.reader.read_ushort()
 
+        if externalTextureFilepath:
+            self.external_path = os.path.join(os.path.dirname(swf.filename), externalTextureFilepath)
+            return
+
         if ktxSize:
-            self.load_khronos_texture(swf.reader.read(ktxSize))
+            self.is_khronos = True
+            self.data_length = ktxSize
+
+        elif not has_external_texture:
+            Console.info(f"SWFTexture: {self.width}x{self.height} - Format: {self.pixel_type} {self.pixel_format} {self.pixel_internal_format}")
+            self.data_length = self.width * self.height * PIXEL_SIZES[self.pixel_internal_format]
+
+        else:
             return
 
-        if externalTextureFilepath:
-            ext = externalTextureFilepath.split(".")[-1]
-            path = os.path.join(os.path.dirname(swf.filename), externalTextureFilepath)
+        self.data = swf.reader.read_view(self.data_length)
+
+    @property
+    def has_source(self) -> bool:
+        return self.data is not None or self.external_path is not None
+
+    @property
+    def is_external(self) -> bool:
+        """KTX / SCTX textures may need PVRTexToolCLI or SctxConverter to be decoded."""
+        return self.is_khronos or self.external_path is not None
+
+    @property
+    def is_pending(self) -> bool:
+        return self._image is None and self.has_source and not self._decode_failed
+
+    def cache_key(self):
+        """Content hash of the compressed texture, None for textures that are not worth caching."""
+        if self.external_path is not None:
+            with open(self.external_path, "rb") as f:
+                return get_texture_cache().key(f.read(), os.path.splitext(self.external_path)[1])
+
+        # Raw pixels decode faster than a cache entry can be hashed and loaded
+        if self.is_khronos:
+            return get_texture_cache().key(self.data, ".ktx")
+
+        return None
+
+    def decode(self):
+        cache = get_texture_cache()
+        key = self.cache_key() if cache.enabled else None
+        if key is not None:
+            self._image = cache.get(key)
+            if self._image is not None:
+                return
+
+        self.decode_source()
+        if self._image is None:
+            self._decode_failed = True
+        elif key is not None:
+            cache.put(key, self._image)
+
+    def decode_source(self):
+        if self.external_path is not None:
+            ext = self.external_path.split(".")[-1]
 
             if ext == "zktx":
                 dctx = zstandard.ZstdDecompressor()
                 buf = io.BytesIO()
-                with open(path, "rb") as f: dctx.copy_stream(f, buf)
-                self.load_khronos_texture(buf.getvalue())
+                with open(self.external_path, "rb") as f: dctx.copy_stream(f, buf)
+                self.load_khronos_texture(buf.getbuffer())
 
             elif ext == "ktx":
-                self.load_khronos_texture(open(path, "rb").read())
+                with open(self.external_path, "rb") as f: self.load_khronos_texture(f.read())
 
             elif ext == "sctx":
-                self.load_sctx_texture(path, externalTextureFilepath)
+                self.load_sctx_texture(self.external_path, os.path.basename(self.external_path))
             return
 
-        if not has_external_texture:
-            Console.info(f"SWFTexture: {self.width}x{self.height} - Format: {self.pixel_type} {self.pixel_format} {self.pixel_internal_format}")
-            self._image = Image.new(MODES_TABLE[self.pixel_format], (self.width, self.height))
-            loaded = self._image.load()
-            self.channels = CHANNLES_TABLE[self._image.mode]
-            read_pixel = PIXEL_READ_FUNCTIONS[self.pixel_internal_format]
-
-            if self.linear:
-                for y in range(self.height):
-                    for x in range(self.width): loaded[x, y] = read_pixel(swf)
-                    Console.progress_bar("Loading texture data...", y, self.height)
-                print()
-            else:
-                block = 32
-                for yb in range((self.height // block) + 1):
-                    for xb in range((self.width // block) + 1):
-                        for y in range(block):
-                            py = yb * block + y
-                            if py >= self.height: break
-                            for x in range(block):
-                                px = xb * block + x
-                                if px >= self.width: break
-                                loaded[px, py] = read_pixel(swf)
-                    Console.progress_bar("Loading splitted texture data...", yb, (self.height // block) + 1)
-                print()
+        if self.is_khronos:
+            self.load_khronos_texture(self.data)
+            return
+
+        mode = MODES_TABLE[self.pixel_format]
+        self.channels = CHANNLES_TABLE[mode]
+
+        pixels = PIXEL_DECODE_FUNCTIONS[self.pixel_internal_format](self.data)
+        if not self.linear:
+            pixels = untile_pixels(pixels, self.width, self.height)
+
+        # Shares memory with the pixels array, linear RGBA8 textures are not copied at all
+        self._image = Image.frombuffer(mode, (self.width, self.height), np.ascontiguousarray(pixels), "raw", mode, 0, 1)
+
+    def release(self):
+        """Drops decoded pixels of a texture that can be decoded again from its source."""
+        if self.has_source:
+            self._image = self._pixels = None
 
     def save(self, has_external_texture):
         super().save()
@@ -277,33 +409,43 @@ class SWFTexture(Writable):
         Console.info(f"SWFTexture: {self.width}x{self.height} - Format: {self.pixel_type} {self.pixel_format} {self.pixel_internal_format}")
 
         if not has_external_texture:
-            loaded = self._image.load()
-            write_pixel = PIXEL_WRITE_FUNCTIONS[self.pixel_internal_format]
+            pixels = np.asarray(self.get_image()).reshape(self.width * self.height, -1)
             if not self.linear:
-                clone = self._image.copy().load()
-                idx = 0
-                for yb in range((self.height // 32) + 1):
-                    for xb in range((self.width // 32) + 1):
-                        for y in range(32):
-                            py = yb * 32 + y
-                            if py >= self.height: break
-                            for x in range(32):
-                                px = xb * 32 + x
-                                if px >= self.width: break
-                                clone[idx % self.width, idx // self.width] = loaded[px, py]
-                                idx += 1
-                loaded = clone
-            for y in range(self.height):
-                Console.progress_bar("Writing texture data...", y, self.height)
-                for x in range(self.width): write_pixel(self, loaded[x, y])
-            print()
+                pixels = tile_pixels(pixels, self.width, self.height)
+
+            self.write(PIXEL_ENCODE_FUNCTIONS[self.pixel_internal_format](pixels).tobytes())
 
         return tag, self.buffer
 
-    def get_image(self): return self._image
+    def get_image(self):
+        if self.is_pending:
+            self.decode()
+
+        if self._decode_failed:
+            source = self.external_path or "embedded KTX data"
+            raise TypeError(f"SWFTexture {self.width}x{self.height} could not be decoded from {source}")
+        return self._image
+
+    def get_pixels(self) -> np.ndarray:
+        """Read-only NumPy view of get_image(), kept until the image is replaced."""
+        image = self.get_image()
+        if self._pixels is None or self._pixels[0] is not image:
+            self._pixels = (image, np.asarray(image))
+        return self._pixels[1]
+
+    def set_pixels(self, pixels: np.ndarray, mode: str):
+        """Uses a contiguous (height, width[, channels]) array as the decoded image without copying it."""
+        self._image = Image.frombuffer(mode, (pixels.shape[1], pixels.shape[0]), pixels, "raw", mode, 0, 1)
+        self._pixels = (self._image, pixels)
+        self._decode_failed = False
+        self.data = self.external_path = None
+        self.channels = CHANNLES_TABLE.get(mode, self.channels)
+        self.width, self.height = self._image.size
 
     def set_image(self, img):
         self._image = img
+        self._decode_failed = False
+        self.data = self.external_path = None
         self.channels = CHANNLES_TABLE[self._image.mode]
         self.width, self.height = self._image.size
         if self.channels == 4:
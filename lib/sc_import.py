@@ -1,4 +1,11 @@
 import copy
+import hashlib
+import heapq
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
 import colorama
 from colorama import Fore, Style
 
@@ -8,18 +15,101 @@ from PIL import Image
 from lib.sc import *
 from lib.fla import *
 
-shape_bitmaps_uvs = []
-shape_bitmaps_twips = []
 shapes_with_nine_slices = {}
 movies_with_nine_slices = []
+matrix_banks_geometry = {}
+
+
+class SpriteRegistry:
+    """Sprites extracted from textures, keyed by texture index and uv coords.
+    Sprites with the same pixels share one media item, except for shapes in nine-slice movieclips,
+    patch_shape_nine_slice extrudes their media items in place."""
+
+    def __init__(self) -> None:
+        self.clear()
+
+    def clear(self):
+        self.regions: dict = {}  # (texture index, uv coords) -> (media index, sprite twips)
+        self.media: dict = {}  # pixels hash -> media index
+        self.media_count: int = 0
+        self.private: set = set()  # shape ids whose bitmaps get media items of their own
+
+        # Filled by prepare_shapes, consumed by convert_shape
+        self.geometry: dict = {}  # (texture index, uv coords) -> (sprite twips, rotation, mirroring)
+        self.prepared: dict = {}  # (texture index, uv coords) -> (sprite, pixels hash) from the process pool
+        self.matrices: dict = {}  # shape id -> matrix params of its bitmaps in conversion order
+
+        self.bitmaps: int = 0
+        self.duplicates: int = 0
+        self.saved_bytes: int = 0
+
+    @staticmethod
+    def key(bitmap: ShapeDrawBitmapCommand, uv_coords: list) -> tuple:
+        return bitmap.texture_index, tuple(map(tuple, uv_coords))
+
+    def find(self, key: tuple):
+        self.bitmaps += 1
+        return self.regions.get(key)
+
+    @staticmethod
+    def digest(sprite: Image.Image) -> bytes:
+        digest = hashlib.blake2b(sprite.tobytes(), digest_size=16)
+        digest.update(f"{sprite.mode} {sprite.size}".encode())
+        return digest.digest()
+
+    def add(self, key: tuple, sprite: Image.Image, digest: bytes, twips: list) -> tuple:
+        """Registers the sprite of a new uv region, returns its media index and True if the media item has to be created."""
+        media_index = self.media.get(digest)
+        created = media_index is None
+        if created:
+            media_index = self.media[digest] = self.media_count
+            self.media_count += 1
+        else:
+            self.duplicates += 1
+            self.saved_bytes += sprite.width * sprite.height * len(sprite.getbands())
+
+        self.regions[key] = media_index, twips
+        return media_index, created
+
+    def add_private(self) -> int:
+        """Media index of a sprite that is not shared with any other bitmap."""
+        self.bitmaps += 1
+        self.media_count += 1
+        return self.media_count - 1
+
+    def report(self, elapsed: float):
+        if not self.media_count:
+            return
+
+        Console.info(f"Sprites: {self.bitmaps} bitmaps, {len(self.regions)} regions, {self.media_count} media "
+                     f"({len(self.regions) / max(len(self.media), 1):.2f}x dedup, {self.saved_bytes / 1024 / 1024:.2f} MB of pixels saved), "
+                     f"resources converted in {elapsed:.2f} s")
+
+
+sprites = SpriteRegistry()
 
 colorama.init()
 
 DUMP=""
 
-def sc_to_fla(filepath):
+def sc_to_fla(filepath, exports: list = None, workers: int = 1):
     swf = SupercellSWF()
-    swf.load(filepath)
+    swf.load(filepath, decode=not exports, workers=workers)
+
+    selected = None
+    if exports:
+        export_ids = swf.find_exports(exports)
+        if not export_ids:
+            Console.warning(f"{swf.filename} has no exports matching {', '.join(exports)}! Skipping...")
+            return
+
+        selected = swf.dependencies(export_ids)
+        Console.info(f"Converting {len(export_ids)} exports with {len(selected)} symbols...")
+
+        # Only the textures of the selected shapes are decoded
+        texture_indices = {bitmap.texture_index for id in selected if isinstance(swf.resources[id], Shape)
+                           for bitmap in swf.resources[id].bitmaps}
+        swf.decode_textures([swf.textures[index] for index in sorted(texture_indices)])
 
     projectdir = os.path.splitext(swf.filename)[0]
 
@@ -30,7 +120,7 @@ def sc_to_fla(filepath):
 
     fla.timelines = startup.timelines
 
-    proceed_resources(fla, swf)
+    proceed_resources(fla, swf, selected)
 
     if not DUMP:
         XFL.save(fla)
@@ -63,14 +153,27 @@ def prepare_document(path):
     return fla
 
 
-def proceed_resources(fla, swf):
+def proceed_resources(fla, swf, selected: set = None):
+    matrix_banks_geometry.clear()
+    sprites.clear()
+    start_time = perf_counter()
+
     for id, resource in swf.resources.items():
         if isinstance(resource, MovieClip) and resource.nine_slice:
             movies_with_nine_slices.append(id)
+            sprites.private.update(bind["id"] for bind in resource.binds if isinstance(swf.resources.get(bind["id"]), Shape))
+
+    resources = swf.resources
+    resources_count = swf.movieclips_count + swf.shapes_count
+    if selected is not None:
+        resources = {id: resource for id, resource in swf.resources.items() if id in selected}
+        resources_count = len([resource for resource in resources.values() if isinstance(resource, (Shape, MovieClip))])
+
+    prepare_shapes(swf, {id: resource for id, resource in resources.items() if isinstance(resource, Shape)})
 
     resource_counter = 0
-    for id, resource in swf.resources.items():
-        Console.progress_bar("Converting SupercellFlash resources to Adobe Animate...", resource_counter,swf.movieclips_count + swf.shapes_count)
+    for id, resource in resources.items():
+        Console.progress_bar("Converting SupercellFlash resources to Adobe Animate...", resource_counter, resources_count)
         if isinstance(resource, Shape):
             convert_shape(fla, swf, id, resource)
 
@@ -82,17 +185,41 @@ def proceed_resources(fla, swf):
         resource_counter += 1
 
     print()
+    sprites.report(perf_counter() - start_time)
+
+def convert_matrix_bank(bank: MatrixBank):
+    """Converts a whole matrix bank to Adobe Animate matrices and colors, instances share them by index."""
+    matrices = [Matrix(*row) for row in bank.matrices.array.tolist()]
+
+    color_transforms = bank.color_transforms.array
+    colors = []
+    for (r_add, g_add, b_add), (a_mul, r_mul, g_mul, b_mul) in zip(color_transforms[:, :3].tolist(),
+                                                                (color_transforms[:, 3:] / 255).tolist()):
+        color = Color()
+        color.red_offset = r_add
+        color.green_offset = g_add
+        color.blue_offset = b_add
+        color.alpha_offset = 0
+        color.red_multiplier = r_mul
+        color.green_multiplier = g_mul
+        color.blue_multiplier = b_mul
+        color.alpha_multiplier = a_mul
+        colors.append(color)
+
+    return matrices, colors
+
 
 def convert_shape(fla, swf, id, shape):
     graphic = DOMSymbolItem(f"shapes/shape_{id}", "graphic")
     graphic.timeline.name = f"shape_{id}"
 
+    matrices = sprites.matrices.pop(id)
     for bitmap_index, bitmap in enumerate(reversed(shape.bitmaps)):
         layer = DOMLayer(f"shape_layer_{bitmap_index}", False)
         frame = DOMFrame(index=0)
 
-        uv_coords = bitmap.uv_coords
-        xy_coords = bitmap.xy_coords
+        uv_coords = bitmap.uv_coords.tolist()
+        xy_coords = bitmap.xy_coords.tolist()
 
         if uv_coords.count(uv_coords[0]) == len(uv_coords):  # color fills is always 1x1
             color_fill = DOMShape()
@@ -139,39 +266,38 @@ def convert_shape(fla, swf, id, shape):
             frame.elements.append(color_fill)
 
         else:
-            if uv_coords not in shape_bitmaps_uvs:
-                shape_bitmaps_uvs.append(uv_coords)
-
-                uvs_index = shape_bitmaps_uvs.index(uv_coords)
-                resource_name = f"M {uvs_index}"
-
-                matrix, twips, rotation, mirror = bitmap.get_matrix(use_nearest=True)
-                shape_bitmaps_twips.append(twips)
-
-                bitmap_item = DOMBitmapItem(f"resources/{uvs_index}", f"{resource_name}.dat")
+            key = SpriteRegistry.key(bitmap, uv_coords)
+            private = id in sprites.private
+            region = None if private else sprites.find(key)
+            if region is None:
+                twips, rotation, mirroring = sprites.geometry[key]
+                prepared = sprites.prepared.get(key) if private else sprites.prepared.pop(key, None)
+                sprite, digest = prepared or extract_sprite(swf, bitmap, rotation, mirroring)
+
+                if private:
+                    uvs_index, created = sprites.add_private(), True
+                else:
+                    uvs_index, created = sprites.add(key, sprite, digest, twips)
+                if created:
+                    resource_name = f"M {uvs_index}"
 
-                bitmap_item.quality = 100
-                bitmap_item.use_imported_jpeg_data = False
-                bitmap_item.allow_smoothing = True
-                bitmap_item.source_external_filepath = f"LIBRARY/resources/{uvs_index}.png"
+                    bitmap_item = DOMBitmapItem(f"resources/{uvs_index}", f"{resource_name}.dat")
 
-                sprite = bitmap.get_image(swf)
-                sprite = sprite.rotate(-rotation, expand = True)
-                if mirror:
-                    sprite = sprite.transpose(Image.FLIP_LEFT_RIGHT)
-                bitmap_item.image = sprite
+                    bitmap_item.quality = 100
+                    bitmap_item.use_imported_jpeg_data = False
+                    bitmap_item.allow_smoothing = True
+                    bitmap_item.source_external_filepath = f"LIBRARY/resources/{uvs_index}.png"
+                    bitmap_item.image = sprite
 
-                fla.media[uvs_index] = bitmap_item
+                    fla.media[uvs_index] = bitmap_item
 
             else:
-                matrix, _, _, _ = bitmap.get_matrix(shape_bitmaps_twips[shape_bitmaps_uvs.index(uv_coords)])
-
-            uvs_index = shape_bitmaps_uvs.index(uv_coords)
+                uvs_index, _ = region
 
             bitmap_instance = DOMBitmapInstance()
             bitmap_instance.library_item_name = f"resources/{uvs_index}"
 
-            a, c, b, d, tx, ty = matrix.params
+            a, c, b, d, tx, ty = matrices[bitmap_index]
             bitmap_instance.matrix = Matrix(a, b, c, d, tx, ty)
 
             frame.elements.append(bitmap_instance)
@@ -182,6 +308,103 @@ def convert_shape(fla, swf, id, shape):
     fla.symbols.add(graphic.name, graphic)
 
 
+def extract_sprite(swf, bitmap: ShapeDrawBitmapCommand, rotation: int, mirroring: bool) -> tuple:
+    """Sprite of a new uv region, turned and mirrored like its matrix expects. Returns (sprite, pixels hash)."""
+    sprite = bitmap.get_image(swf)
+    sprite = sprite.rotate(-rotation, expand = True)
+    if mirroring:
+        sprite = sprite.transpose(Image.FLIP_LEFT_RIGHT)
+
+    return sprite, SpriteRegistry.digest(sprite)
+
+
+def prepare_shapes(swf, shapes: dict):
+    """Estimates the bitmap matrices of all shapes at once, see ShapeDrawBitmapCommand.get_matrices.
+    The first bitmap of a uv region in conversion order defines its sprite and twips, later ones are mapped onto them.
+    With more than one worker sprites are extracted in a process pool here, media indices are still assigned
+    by convert_shape in conversion order, so the output is the same as of a serial run."""
+    regions = {}  # (texture index, uv coords) -> (shape id, bitmap index, bitmap) of the first bitmap
+    repeats = []  # (shape id, bitmap index, region key, bitmap)
+    for id, shape in shapes.items():
+        sprites.matrices[id] = [None] * len(shape.bitmaps)
+        for bitmap_index, bitmap in enumerate(reversed(shape.bitmaps)):
+            uv_coords = bitmap.uv_coords.tolist()
+            if uv_coords.count(uv_coords[0]) == len(uv_coords):
+                continue
+
+            key = SpriteRegistry.key(bitmap, uv_coords)
+            if key in regions:
+                repeats.append((id, bitmap_index, key, bitmap))
+            else:
+                regions[key] = id, bitmap_index, bitmap
+
+    matrices = ShapeDrawBitmapCommand.get_matrices([bitmap for _, _, bitmap in regions.values()], use_nearest=True)
+    for (key, (id, bitmap_index, _)), (matrix, twips, rotation, mirroring) in zip(regions.items(), matrices):
+        sprites.geometry[key] = twips, rotation, mirroring
+        sprites.matrices[id][bitmap_index] = matrix.params
+
+    matrices = ShapeDrawBitmapCommand.get_matrices([bitmap for _, _, _, bitmap in repeats],
+                                                   [sprites.geometry[key][0] for _, _, key, _ in repeats])
+    for (id, bitmap_index, _, _), (matrix, _, _, _) in zip(repeats, matrices):
+        sprites.matrices[id][bitmap_index] = matrix.params
+
+    if swf.workers > 1 and regions:
+        extract_sprites(swf, regions)
+
+
+def extract_sprites(swf, regions: dict):
+    """Extracts the sprites of new uv regions in a process pool into sprites.prepared."""
+    # Workers read the decoded textures from shared memory instead of getting a copy each
+    textures = [None] * len(swf.textures)
+    memories = []
+    for index in sorted({key[0] for key in regions}):
+        pixels = swf.textures[index].get_pixels()
+        memory = shared_memory.SharedMemory(create=True, size=max(pixels.nbytes, 1))
+        memories.append(memory)
+
+        np.ndarray(pixels.shape, pixels.dtype, memory.buf)[:] = pixels
+        textures[index] = memory.name, pixels.shape, pixels.dtype.str, swf.textures[index].get_image().mode
+
+    workers = min(swf.workers, len(regions))
+    Console.info(f"Extracting {len(regions)} sprites with {workers} processes...")
+    try:
+        with ProcessPoolExecutor(workers, initializer=init_shape_worker, initargs=(textures,)) as executor:
+            bitmaps = [bitmap for _, _, bitmap in regions.values()]
+            rotations, mirrorings = zip(*[sprites.geometry[key][1:] for key in regions])
+
+            results = executor.map(prepare_region, bitmaps, rotations, mirrorings, chunksize=len(regions) // (workers * 4) + 1)
+            for key, result in zip(regions, results):
+                sprites.prepared[key] = result
+    finally:
+        for memory in memories:
+            memory.close()
+            memory.unlink()
+
+
+worker_swf = None
+worker_memories = []
+
+
+def init_shape_worker(textures: list):
+    """Process pool initializer of extract_sprites, attaches the shared textures."""
+    global worker_swf
+
+    worker_swf = SupercellSWF()
+    worker_swf.textures = [SWFTexture() for _ in textures]
+    for texture, shared in zip(worker_swf.textures, textures):
+        if shared is None:
+            continue
+
+        name, shape, dtype, mode = shared
+        memory = shared_memory.SharedMemory(name)
+        worker_memories.append(memory)
+        texture.set_pixels(np.ndarray(shape, dtype, memory.buf), mode)
+
+
+def prepare_region(bitmap: ShapeDrawBitmapCommand, rotation: int, mirroring: bool) -> tuple:
+    return extract_sprite(worker_swf, bitmap, rotation, mirroring)
+
+
 def patch_shape_nine_slice(fla, id, shape):
     shape_slice = DOMGroup()
 
@@ -234,6 +457,85 @@ def patch_shape_nine_slice(fla, id, shape):
     return shape_slice
 
 
+def order_layers(layers_order: list, frames: list) -> list:
+    """Orders layers so that the binds of every frame stack like in that frame, frames are lists of bind indices from bottom to top.
+    Every frame adds precedence constraints between its neighbouring binds, they are sorted topologically.
+    Without conflicts ties go by the order the former pairwise reordering settles on, see replay_layers_order,
+    frames that disagree with each other form cycles, they are broken at the bind with the fewest pending constraints."""
+    followers = {bind: set() for bind in layers_order}
+    predecessors = dict.fromkeys(layers_order, 0)
+
+    for elements in frames:
+        elements = list(dict.fromkeys(elements))  # a bind used twice in a frame counts at its first place
+        for lower, upper in zip(elements, elements[1:]):
+            if upper not in followers[lower]:
+                followers[lower].add(upper)
+                predecessors[upper] += 1
+
+    ordered, acyclic = sort_layers(layers_order, followers, predecessors)
+    if not acyclic:
+        return ordered
+
+    ordered, _ = sort_layers(replay_layers_order(layers_order, frames), followers, predecessors)
+    return ordered
+
+
+def sort_layers(layers_order: list, followers: dict, predecessors: dict) -> tuple:
+    """Kahn's algorithm, ready binds are taken in layers_order. Returns the order and False if a cycle had to be broken."""
+    position = {bind: index for index, bind in enumerate(layers_order)}
+    pending = dict(predecessors)
+    acyclic = True
+
+    ready = [position[bind] for bind in layers_order if not pending[bind]]
+    heapq.heapify(ready)
+
+    ordered = []
+    while len(ordered) < len(layers_order):
+        if ready:
+            bind = layers_order[heapq.heappop(ready)]
+        else:
+            bind = min((bind for bind, count in pending.items() if count), key=lambda bind: (pending[bind], position[bind]))
+            acyclic = False
+
+        pending[bind] = None
+        ordered.append(bind)
+
+        for upper in followers[bind]:
+            if pending[upper]:
+                pending[upper] -= 1
+                if not pending[upper]:
+                    heapq.heappush(ready, position[upper])
+
+    return ordered, acyclic
+
+
+def replay_layers_order(layers_order: list, frames: list) -> list:
+    """The former per frame reordering: every bind of a frame that stacks the other way round than in the frame
+    is moved to the place of the compared bind. Frames that already stack like the current order are skipped, they would not move anything.
+    Positions are kept up to date with each move, only the binds between the two places shift."""
+    layers_order = list(layers_order)
+    position = {bind: index for index, bind in enumerate(layers_order)}
+
+    for elements in frames:
+        first = list(dict.fromkeys(elements))
+        if all(position[lower] < position[upper] for lower, upper in zip(first, first[1:])):
+            continue
+
+        frame_position = {bind: index for index, bind in enumerate(first)}
+        for element in elements:
+            for comparative in elements:
+                if comparative != element:
+                    bind_pos = position[element]
+                    cmp_bind_pos = position[comparative]
+
+                    if (frame_position[element] > frame_position[comparative]) != (bind_pos > cmp_bind_pos):
+                        layers_order.insert(bind_pos, layers_order.pop(cmp_bind_pos))
+                        for index in range(min(bind_pos, cmp_bind_pos), max(bind_pos, cmp_bind_pos) + 1):
+                            position[layers_order[index]] = index
+
+    return layers_order
+
+
 def convert_movieclip(fla: DOMDocument, swf: SupercellSWF, id, movieclip: MovieClip, export_names: list or None = None):
     movie = DOMSymbolItem()
 
@@ -372,24 +674,19 @@ def convert_movieclip(fla: DOMDocument, swf: SupercellSWF, id, movieclip: MovieC
             layers_instance.append(bind_layer)
 
     # Converting frames
-    for i, frame in enumerate(movieclip.frames):
-        elements = [element['bind'] for element in frame.elements]
-        elements_idx = [element for element in elements if not isinstance(swf.resources[movieclip.binds[element]['id']], MovieClipModifier)]
-
-        for element in elements_idx:
-            for comparative in elements_idx:
-                if comparative != element:
-                    element_pos = elements_idx.index(element)
-                    bind_pos = layers_order.index(element)
+    if movieclip.matrix_bank not in matrix_banks_geometry:
+        matrix_banks_geometry[movieclip.matrix_bank] = convert_matrix_bank(swf.matrix_banks[movieclip.matrix_bank])
+    bank_matrices, bank_colors = matrix_banks_geometry[movieclip.matrix_bank]
 
-                    comparative_pos = elements_idx.index(comparative)
-                    cmp_bind_pos = layers_order.index(comparative)
+    layers_binds = set(layers_order)
+    frames_order = []
 
-                    frame_position = element_pos > comparative_pos  # higher if True else lower
-                    binds_position = bind_pos > cmp_bind_pos
+    previous_elements = set()
+    for i, frame in enumerate(movieclip.frames):
+        frame_elements = frame.elements.tolist()  # (bind, matrix, color) tuples
+        elements = [bind for bind, _, _ in frame_elements]
+        frames_order.append([element for element in elements if element in layers_binds])
 
-                    if frame_position != binds_position:
-                        layers_order.insert(layers_order.index(element), layers_order.pop(cmp_bind_pos))
         mask = False
         masked = False
         mask_layer = None
@@ -421,10 +718,11 @@ def convert_movieclip(fla: DOMDocument, swf: SupercellSWF, id, movieclip: MovieC
                             masked_layers[mask_layer].append(curr_layer)
                             masked_layers_order[mask_layer].append(masked_layers[mask_layer].index(curr_layer))
 
-                    element = frame.elements[elements.index(layer_idx)]
+                    element = frame_elements[elements.index(layer_idx)]
+                    _, matrix_index, color_index = element
 
                     if curr_layer.frames and i:
-                        if element in movieclip.frames[i-1].elements:
+                        if element in previous_elements:
                             curr_layer.frames[-1].duration += 1
                             continue
 
@@ -432,22 +730,11 @@ def convert_movieclip(fla: DOMDocument, swf: SupercellSWF, id, movieclip: MovieC
                     instance = copy.deepcopy(symbols_instance[layer_idx])
 
 
-                    if element["matrix"] != 0xFFFF:
-                        m = swf.matrix_banks[movieclip.matrix_bank].matrices[element["matrix"]]
-                        instance.matrix = Matrix(m.a, m.b, m.c, m.d, m.tx, m.ty)
+                    if matrix_index != 0xFFFF:
+                        instance.matrix = bank_matrices[matrix_index]
 
-                    if element["color"] != 0xFFFF:
-                        c = swf.matrix_banks[movieclip.matrix_bank].color_transforms[element["color"]]
-                        bind_color = Color()
-                        bind_color.red_offset = c.r_add
-                        bind_color.green_offset = c.g_add
-                        bind_color.blue_offset = c.b_add
-                        bind_color.alpha_offset = 0
-                        bind_color.red_multiplier = c.r_mul
-                        bind_color.green_multiplier = c.g_mul
-                        bind_color.blue_multiplier = c.b_mul
-                        bind_color.alpha_multiplier = c.a_mul
-                        instance.color = bind_color
+                    if color_index != 0xFFFF:
+                        instance.color = bank_colors[color_index]
 
                     layer_frame.elements.append(instance)
                     curr_layer.frames.append(layer_frame)
@@ -458,6 +745,9 @@ def convert_movieclip(fla: DOMDocument, swf: SupercellSWF, id, movieclip: MovieC
                     else:
                         curr_layer.frames.append(DOMFrame(i))
 
+        previous_elements = set(frame_elements)
+
+    layers_order = order_layers(layers_order, frames_order)
     layers_order = [o for o in layers_order if
                     layers_instance[o] not in [masked_layers[order_key][value] for order_key, order_list in
                                                masked_layers_order.items() for value in order_list]]
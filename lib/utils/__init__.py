@@ -1,2 +1,3 @@
 from .reader import BinaryReader
-from .writer import BinaryWriter
\ No newline at end of file
+from .writer import BinaryWriter
+from .compression import decompress, decompress_head, load_compressed, load_compressed_head
@@ -0,0 +1,135 @@
+import lzma
+import mmap
+
+from sc_compression import Decompressor
+
+import zstandard
+
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Compressed input fed at once by decompress_head
+HEAD_CHUNK_SIZE = 1 << 14
+
+
+def decompress(data: memoryview, version: int = -1) -> bytes:
+    """Decompresses .sc file data, LZMA and Zstandard payloads are read straight from the view without copying."""
+    if data[:4] == b"SCLZ":
+        # LZHAM files are rare, they go through sc-compression
+        return Decompressor().decompress(bytes(data))
+
+    if data[:2] == b"SC":
+        version = int.from_bytes(data[2:6], "big")
+        offset = 6
+        if version >= 4:
+            version = int.from_bytes(data[6:10], "big")
+            offset = 10
+
+        hash_length = int.from_bytes(data[offset:offset + 4], "big")
+        return decompress(data[offset + 4 + hash_length:], version)
+
+    if data[:4] == b"Sig:":
+        return decompress(data[68:], version)
+
+    if data[1:3] == b"\x00\x00":
+        # Supercell stores a 4 byte uncompressed size instead of the usual 8 byte one,
+        # so the stream is decoded as raw LZMA1 with the properties from its header
+        properties = data[0]
+        decompressor = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[{
+            "id": lzma.FILTER_LZMA1,
+            "dict_size": int.from_bytes(data[1:5], "little"),
+            "lc": properties % 9,
+            "lp": properties // 9 % 5,
+            "pb": properties // 45
+        }])
+        return decompressor.decompress(data[9:])
+
+    if version >= 2 and data[:4] == ZSTD_MAGIC:
+        return zstandard.ZstdDecompressor().decompress(data)
+
+    return bytes(data)
+
+
+def decompress_head(data: memoryview, size: int, version: int = -1) -> bytes:
+    """Decompresses only the first `size` bytes of .sc file data, the rest of the stream is not touched."""
+    if data[:4] == b"SCLZ":
+        return decompress(data, version)[:size]
+
+    if data[:2] == b"SC":
+        version = int.from_bytes(data[2:6], "big")
+        offset = 6
+        if version >= 4:
+            version = int.from_bytes(data[6:10], "big")
+            offset = 10
+
+        hash_length = int.from_bytes(data[offset:offset + 4], "big")
+        return decompress_head(data[offset + 4 + hash_length:], size, version)
+
+    if data[:4] == b"Sig:":
+        return decompress_head(data[68:], size, version)
+
+    if data[1:3] == b"\x00\x00":
+        properties = data[0]
+        decompressor = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[{
+            "id": lzma.FILTER_LZMA1,
+            "dict_size": int.from_bytes(data[1:5], "little"),
+            "lc": properties % 9,
+            "lp": properties // 9 % 5,
+            "pb": properties // 45
+        }])
+
+        # Input is fed in chunks, so only the compressed bytes of the head are read from disk
+        chunks = []
+        length = 0
+        offset = 9
+        while length < size and not decompressor.eof:
+            chunk = b""
+            if decompressor.needs_input:
+                chunk = data[offset:offset + HEAD_CHUNK_SIZE]
+                offset += HEAD_CHUNK_SIZE
+                if not chunk:
+                    break
+
+            chunks.append(decompressor.decompress(chunk, size - length))
+            length += len(chunks[-1])
+
+        return b"".join(chunks)
+
+    if version >= 2 and data[:4] == ZSTD_MAGIC:
+        with zstandard.ZstdDecompressor().stream_reader(data) as reader:
+            chunks = []
+            length = 0
+            while length < size:
+                chunk = reader.read(size - length)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                length += len(chunk)
+
+        return b"".join(chunks)
+
+    return bytes(data[:size])
+
+
+def load_compressed(filepath: str) -> bytes:
+    """Memory maps an .sc file and decompresses everything before the START metadata block."""
+    with open(filepath, "rb") as file:
+        if not file.seek(0, 2):
+            return b""
+
+        # The mapping is released together with the last view of it
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    end = mapped.find(b"START")
+    return decompress(memoryview(mapped)[:end if end != -1 else len(mapped)])
+
+
+def load_compressed_head(filepath: str, size: int) -> bytes:
+    """Memory maps an .sc file and decompresses its first `size` bytes."""
+    with open(filepath, "rb") as file:
+        if not file.seek(0, 2):
+            return b""
+
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return decompress_head(memoryview(mapped), size)
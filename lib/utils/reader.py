@@ -1,12 +1,39 @@
 from io import BytesIO
+import struct
+
+import numpy as np
 
 
 class BinaryReader(BytesIO):
     def __init__(self, initial_bytes: bytes) -> None:
         super().__init__(initial_bytes)
+        self.view = memoryview(initial_bytes)
 
     def skip(self, size: int):
-        self.read(size)
+        self.seek(size, 1)
+
+    def read_view(self, size: int) -> memoryview:
+        """Reads a blob as a zero-copy slice of the initial buffer."""
+        position = self.tell()
+        self.skip(size)
+        return self.view[position:position + size]
+
+    def read_struct(self, fmt: str) -> tuple:
+        """Reads one struct.Struct formatted record."""
+        return struct.unpack(fmt, self.read(struct.calcsize(fmt)))
+
+    def read_struct_array(self, fmt: str, count: int) -> list:
+        """Reads `count` consecutive records of a struct.Struct format as tuples."""
+        size = struct.calcsize(fmt)
+        return list(struct.iter_unpack(fmt, self.read_view(size * count))) if count else []
+
+    def read_array(self, dtype: np.dtype, count: int) -> np.ndarray:
+        """Reads `count` records of a NumPy dtype, the array is a read-only view of the buffer."""
+        return np.frombuffer(self.read_view(count * dtype.itemsize), dtype)
+
+    def read_ushort_array(self, count: int) -> np.ndarray:
+        """Reads `count` little endian unsigned shorts, the array is a read-only view of the buffer."""
+        return self.read_array(np.dtype("<u2"), count)
 
     def read_bool(self):
         return self.read_uchar() >= 1
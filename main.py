@@ -8,6 +8,7 @@ import subprocess
 import logging
 import colorama
 import importlib
+import json
 
 from lib import sc_import
 import sys as _sys
@@ -15,7 +16,7 @@ _sys.modules["sc_import"] = sc_import
 _sys.modules["lib.sc_import"] = sc_import
 
 from sc_compression.signatures import Signatures
-from sc_compression import Decompressor, Compressor
+from sc_compression import Compressor
 from lib.console import Console, Time
 from colorama import Fore, Style
 
@@ -39,6 +40,10 @@ from lib.tools import (
     ToolExecutionError,
     ToolNotFoundError
 )
+from lib.cache import get_texture_cache, get_swf_cache
+from lib.export_index import open_export_index
+from lib.utils import load_compressed
+from lib.sc import SupercellSWF
 
 
 sc1_ver = [1, 2, 3, 4]
@@ -124,6 +129,78 @@ def get_used_version(data):
     return None
 
 
+def read_used_version(filepath):
+    with open(filepath, "rb") as f:
+        return get_used_version(f.read(6))
+
+
+def collect_info(filepath):
+    """Header summary of an .sc file, only the beginning of the file is read and decompressed."""
+    info = {"file": os.path.basename(filepath), "size": os.path.getsize(filepath)}
+
+    version = read_used_version(filepath)
+    info["version"] = version
+    if version is None:
+        info["error"] = "Bad File Magic"
+    elif version in sc2_ver:
+        info["error"] = "SC2 file, downgrade required"
+    else:
+        try:
+            swf = SupercellSWF()
+            swf.load_header_only(filepath)
+            info.update(swf.info())
+        except Exception as e:
+            info["error"] = str(e) or type(e).__name__
+
+    return info
+
+
+def print_info(infos, as_json):
+    if as_json:
+        print(json.dumps(infos, indent=2, ensure_ascii=False))
+        return
+
+    columns = ("File", "Ver", "Size MB", "Shapes", "MCs", "Textures", "TFs", "Matrices", "Colors", "Exports", "Ext. Texture")
+    rows = []
+    for info in infos:
+        if "error" in info:
+            rows.append((info["file"], str(info["version"] or "-"), f"{info['size'] / 1048576:.2f}", info["error"]))
+            continue
+
+        external = "-"
+        if info["external_texture"]:
+            external = "highres/lowres" if info["uncommon_texture"] else ("lowres" if info["lowres_texture"] else "yes")
+
+        rows.append((info["file"], str(info["version"]), f"{info['size'] / 1048576:.2f}",
+                     str(info["shapes"]), str(info["movieclips"]), str(info["textures"]), str(info["text_fields"]),
+                     str(info["matrices"]), str(info["color_transforms"]), str(len(info["exports"])), external))
+
+    # Rows of files that failed end with the error message, it is not aligned
+    widths = [len(column) for column in columns]
+    for row in rows:
+        for i, value in enumerate(row if len(row) == len(columns) else row[:-1]):
+            widths[i] = max(widths[i], len(value))
+
+    print("  ".join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)))
+
+
+def print_exports(rows, as_json):
+    if as_json:
+        print(json.dumps([{"name": name, "id": id, "file": path, "version": version} for name, id, path, version in rows],
+                         indent=2, ensure_ascii=False))
+        return
+
+    if not rows:
+        logger.warning("No matching exports found.")
+        return
+
+    width = max(len(name) for name, _, _, _ in rows)
+    for name, id, path, _ in rows:
+        print(f"{name.ljust(width)}  {str(id).rjust(5)}  {path}")
+
+
 def downgrade(filepath):
     """Downgradet SC2 zu SC1 Format (plattformübergreifend)"""
     try:
@@ -144,7 +221,7 @@ def downgrade(filepath):
         return False
 
 
-def process_file(filepath, dump):
+def process_file(filepath, dump, exports=None, workers=1):
     importlib.invalidate_caches()
     import lib.sc_import as sc_import
     importlib.reload(sc_import)
@@ -154,29 +231,24 @@ def process_file(filepath, dump):
     print("-" * 20)
     logger.info(f"Processing: {os.path.basename(filepath)}")
 
-    with open(filepath, "rb") as f:
-        data = f.read()
-
-    version = get_used_version(data)
+    version = read_used_version(filepath)
     if version is None:
         logger.critical(f"Bad File Magic: {os.path.basename(filepath)}")
         return
 
     if version in sc1_ver:
-        sc_to_fla(filepath)
+        sc_to_fla(filepath, exports, workers)
     elif version in sc2_ver:
         logger.info("SC2 file Detected - Downgrading")
         if not downgrade(filepath):
             logger.warning("Downgrade failed! Skipping file...")
             return
 
-        with open(filepath, "rb") as f:
-            data = f.read()
-        version = get_used_version(data)
+        version = read_used_version(filepath)
 
         if version is not None and version not in sc2_ver:
             logger.info("Processing SC1 file")
-            sc_to_fla(filepath)
+            sc_to_fla(filepath, exports, workers)
         else:
             logger.warning("Processing Failed! Skipping file...")
     else:
@@ -198,9 +270,18 @@ def main():
     parser.add_argument("-p", "--process", type=str, metavar='FILE/DIR', help="Process .sc file or directory")
     parser.add_argument("-dr", "--dump-raw", action="store_true", help="Dumps RAW resources of .sc files")
     parser.add_argument("-dp", "--dump-png", action="store_true", help="Dumps PNG resources of .sc files")
+    parser.add_argument("-i", "--info", type=str, metavar='FILE/DIR', help="Show header info of .sc files without parsing them")
+    parser.add_argument("--index", type=str, metavar='DIR', help="Add the exports of all .sc files in DIR to the export index")
+    parser.add_argument("--find", type=str, metavar='NAME/PATTERN', help="Find exports in the export index")
+    parser.add_argument("--json", action="store_true", help="Print --info and --find as JSON")
     parser.add_argument("-dx", "--decompress", type=str, metavar='FILE', help="Decompress .sc files")
     parser.add_argument("-cx", "--compress", type=str, metavar='FILE', help="Compress .sc files (LZMA | SC | v1)")
+    parser.add_argument("-e", "--export", action="append", metavar='NAME/PATTERN', help="Convert only matching exports and the symbols they use")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar='N', help="Extract shape sprites in N processes")
     parser.add_argument("-s", "--sort-layers", action="store_true", help="Enable layer sorting during decompilation")
+    parser.add_argument("--swf-cache", action="store_true", help="Cache parsed .sc files for faster reloads")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the decoded texture and parsed file caches")
+    parser.add_argument("--clear-cache", action="store_true", help="Clear the decoded texture and parsed file caches")
     # Neue macOS-spezifische Argumente
     parser.add_argument("--platform", action="store_true", help="Show platform information")
     parser.add_argument("--tools", action="store_true", help="Show tool status and paths")
@@ -225,26 +306,75 @@ def main():
         print_config_status()
         return
 
+    texture_cache = get_texture_cache()
+    swf_cache = get_swf_cache()
+    if args.clear_cache:
+        logger.info(f"Cleared {texture_cache.clear()} cached textures.")
+        logger.info(f"Cleared {swf_cache.clear()} cached files.")
+        if not (args.process or args.decompress or args.compress):
+            return
+
+    if args.swf_cache:
+        swf_cache.enabled = True
+
+    if args.no_cache:
+        texture_cache.enabled = False
+        swf_cache.enabled = False
+
     if args.help or len(sys.argv) == 1:
         print()
         print_centered("FOSS Support by GenericName1911 - github.com/GenericName1911", Fore.LIGHTMAGENTA_EX)
         print_centered("SC2FLA Toolkit by SCW Make - github.com/scwmake/SC", Fore.GREEN)
         print_centered(f"Running on: {PLATFORM.os.value} ({PLATFORM.arch.value})", Fore.CYAN)
-        print("\nusage: main.py [-h] [-p] [-d] [-dx/-cx] [-s] input")
+        print("\nusage: main.py [-h] [-p] [-i] [-d] [-dx/-cx] [-e] [-s] input")
         print("\nArguments:")
         print("  -h,  --help             Show this help message and exit")
         print("  -p,  --process          Process .sc file or directory")
         print("  -dr,  --dump-raw        Dumps RAW resources of .sc files")
         print("  -dp,  --dump-png        Dumps PNG resources of .sc files")
+        print("  -i,  --info             Show header info of .sc files (table, or JSON with --json)")
+        print("  --index                 Add the exports of all .sc files in a directory to the export index")
+        print("  --find                  Find exports in the export index (name or pattern)")
         print("  -dx, --decompress       Decompress .sc files")
         print("  -cx, --compress         Compress .sc files (LZMA | SC | V1)")
+        print("  -e,  --export           Convert only matching exports (name or pattern, repeatable)")
+        print("  -j,  --jobs             Extract shape sprites in N processes")
         print("  -s,  --sort-layers      Enable layer sorting")
+        print("  --swf-cache             Cache parsed .sc files for faster reloads")
+        print("  --no-cache              Bypass the decoded texture and parsed file caches")
+        print("  --clear-cache           Clear the decoded texture and parsed file caches")
         print("\nPlatform Commands:")
         print("  --platform              Show platform information")
         print("  --tools                 Show tool status and paths")
         print("  --config                Show configuration status")
         print(f"\nDone in {Time(time.time() - start_time)} seconds.")
         return
+
+    if args.info:
+        path = os.path.abspath(args.info)
+        if os.path.isdir(path):
+            files = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+        else:
+            files = [path]
+
+        print_info([collect_info(file) for file in files if os.path.isfile(file) and sc_file_filter(file)], args.json)
+        return
+
+    if args.index or args.find:
+        export_index = open_export_index()
+
+        if args.index:
+            root = os.path.abspath(args.index)
+            files = [os.path.join(directory, name) for directory, _, names in os.walk(root) for name in sorted(names)]
+            stats = export_index.update([file for file in files if sc_file_filter(file)], collect_info, root)
+            logger.info(f"Export index: {stats['indexed']} indexed, {stats['touched']} touched, {stats['skipped']} unchanged, "
+                        f"{stats['removed']} removed, {export_index.files_count} files in {export_index.path}")
+
+        if args.find:
+            print_exports(export_index.find(args.find), args.json)
+
+        export_index.close()
+        return
         
     verify_files()    
     
@@ -263,6 +393,12 @@ def main():
         logger.error("Both RAW and PNG dump cannot be enabled at the same time.")
         sys.exit(1)
     
+    if args.export:
+        logger.info(f"Exports: {', '.join(args.export)}")
+
+    if args.jobs > 1:
+        logger.info(f"Extracting sprites with {args.jobs} processes.")
+
     if args.sort_layers:
         logger.info("Layer Sorting Enabled.")
     else:
@@ -271,22 +407,25 @@ def main():
     if args.process:
         path = os.path.abspath(args.process)
         if os.path.isfile(path) and sc_file_filter(path):
-            process_file(path, args.dump_raw)
+            process_file(path, args.dump_raw, args.export, args.jobs)
         elif os.path.isfile(path) and os.path.splitext(args.process)[1] != ".sc":
             logger.warning(f"Invalid File: {os.path.basename(args.process)}")
         elif os.path.isdir(path):
             for name in os.listdir(path):
                 full = os.path.join(path, name)
                 if os.path.isfile(full) and sc_file_filter(full):
-                    process_file(full, args.dump_raw)
+                    process_file(full, args.dump_raw, args.export, args.jobs)
+
+        if texture_cache.enabled:
+            logger.info(f"Texture cache: {texture_cache.hits} hits, {texture_cache.misses} misses, {texture_cache.evictions} evictions")
+        if swf_cache.enabled:
+            logger.info(f"SWF cache: {swf_cache.hits} hits, {swf_cache.misses} misses, {swf_cache.evictions} evictions")
 
     elif args.decompress:
         file = args.decompress
         logger.info(f"Decompressing: {os.path.basename(file)}")
         if os.path.isfile(file):
-            with open(file, 'rb') as f:
-                raw = f.read().split(b"START")[0]
-            dec = Decompressor().decompress(raw)
+            dec = load_compressed(file)
             with open(file + ".dec", 'wb') as out:
                 out.write(dec)
 
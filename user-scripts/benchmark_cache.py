@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+benchmark_cache.py - Vergleicht SupercellSWF.load mit und ohne SWF Cache
+
+Lädt eine .sc Datei einmal ohne Cache, einmal mit leerem Cache (parsen und speichern)
+und dann mehrmals aus dem Cache. Der Cache liegt dabei in einem temporären Ordner,
+Texturen werden nicht dekodiert.
+
+Verwendung: python user-scripts/benchmark_cache.py <datei.sc> [wiederholungen]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_DIR))
+
+import lib.cache
+from lib.cache import SWFCache
+from lib.sc import SupercellSWF
+
+
+def measure(path: str) -> float:
+    swf = SupercellSWF()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        swf.load(path, decode=False)
+    return time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    path = sys.argv[1]
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = lib.cache._swf_cache = SWFCache(directory, 1 << 40, False)
+        cold = measure(path)
+
+        cache.enabled = True
+        store = measure(path)
+        warm = min(measure(path) for _ in range(repeats))
+
+        print(f"{os.path.basename(path)} (Cache: {cache.size / 1024 / 1024:.1f} MB)")
+        print(f"  Ohne Cache:      {cold:6.2f} s")
+        print(f"  Parsen+Speichern:{store:6.2f} s")
+        print(f"  Aus dem Cache:   {warm:6.2f} s ({cold / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+benchmark_layers.py - Vergleicht die Ebenenreihenfolge von convert_movieclip mit dem alten Verfahren
+
+Erzeugt zufällige Movieclips mit wachsender Anzahl an Binds und Frames, deren Frames einer
+gemeinsamen Reihenfolge folgen, und misst order_layers gegen den früheren paarweisen Vergleich
+pro Frame. Die Frames sind einmal zusammenhängende Ausschnitte einer fast sortierten Reihenfolge
+und einmal beliebige Teilfolgen einer gemischten, dazu prüfen viele kleine Movieclips die Gleichheit.
+Wo das alte Verfahren eine gültige Reihenfolge liefert, müssen beide übereinstimmen.
+
+Verwendung: python user-scripts/benchmark_layers.py [binds:frames ...]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_DIR))
+
+from lib.sc_import import order_layers
+
+
+def order_layers_pairwise(layers_order: list, frames: list) -> list:
+    """Das frühere Verfahren aus convert_movieclip."""
+    layers_order = list(layers_order)
+    for elements_idx in frames:
+        for element in elements_idx:
+            for comparative in elements_idx:
+                if comparative != element:
+                    element_pos = elements_idx.index(element)
+                    bind_pos = layers_order.index(element)
+
+                    comparative_pos = elements_idx.index(comparative)
+                    cmp_bind_pos = layers_order.index(comparative)
+
+                    if (element_pos > comparative_pos) != (bind_pos > cmp_bind_pos):
+                        layers_order.insert(layers_order.index(element), layers_order.pop(cmp_bind_pos))
+    return layers_order
+
+
+def is_valid(layers_order: list, frames: list) -> bool:
+    position = {bind: index for index, bind in enumerate(layers_order)}
+    return all(position[lower] < position[upper] for elements in frames for lower, upper in zip(elements, elements[1:]))
+
+
+def generate(binds: int, frames: int, rng: random.Random) -> tuple:
+    """Binds fast in Zeichenreihenfolge mit einigen Vertauschungen, Frames zeigen zusammenhängende Ausschnitte davon."""
+    layers_order = list(range(binds))
+
+    stacking = list(layers_order)
+    for _ in range(binds // 10 + 1):
+        index = rng.randrange(binds)
+        stacking.insert(min(binds - 1, index + rng.randint(1, 5)), stacking.pop(index))
+
+    frames_order = []
+    for _ in range(frames):
+        start = rng.randrange(binds)
+        end = rng.randint(start + 1, min(binds, start + 80))
+        frames_order.append([bind for bind in stacking[start:end] if rng.random() < 0.8])
+
+    return layers_order, frames_order
+
+
+def generate_shuffled(binds: int, frames: int, rng: random.Random) -> tuple:
+    """Binds in beliebiger Zeichenreihenfolge, Frames sind beliebige Teilfolgen davon."""
+    layers_order = list(range(binds))
+
+    stacking = list(layers_order)
+    rng.shuffle(stacking)
+
+    frames_order = []
+    for _ in range(frames):
+        indices = sorted(rng.sample(range(binds), rng.randint(1, min(binds, 80))))
+        frames_order.append([stacking[index] for index in indices])
+
+    return layers_order, frames_order
+
+
+def compare(frames_order: list, pairwise: list, ordered: list) -> str:
+    if not is_valid(ordered, frames_order):
+        return "ungültig"
+    if not is_valid(pairwise, frames_order):
+        return "altes Verfahren ungültig"
+    return "gleich" if pairwise == ordered else "abweichend"
+
+
+def measure(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    sizes = [tuple(map(int, size.split(":"))) for size in sys.argv[1:]] or [(25, 100), (50, 500), (100, 1000), (200, 2000)]
+
+    rng = random.Random(0)
+    failed = False
+    for name, generator in (("Fast sortiert", generate), ("Teilfolgen", generate_shuffled)):
+        print(name)
+        for binds, frames in sizes:
+            layers_order, frames_order = generator(binds, frames, rng)
+
+            pairwise_time, pairwise = measure(order_layers_pairwise, layers_order, frames_order)
+            sorted_time, ordered = measure(order_layers, layers_order, frames_order)
+
+            status = compare(frames_order, pairwise, ordered)
+            failed |= status in ("ungültig", "abweichend")
+
+            print(f"  {binds:4} Binds, {frames:5} Frames: paarweise {pairwise_time:7.3f} s, "
+                  f"topologisch {sorted_time:7.4f} s ({pairwise_time / sorted_time:6.0f}x), {status}")
+
+    statuses = {}
+    for _ in range(20000):
+        layers_order, frames_order = generate_shuffled(rng.randint(2, 9), rng.randint(1, 5), rng)
+        status = compare(frames_order, order_layers_pairwise(layers_order, frames_order),
+                         order_layers(layers_order, frames_order))
+        statuses[status] = statuses.get(status, 0) + 1
+    failed |= "ungültig" in statuses or "abweichend" in statuses
+
+    print("Kleine Teilfolgen: " + ", ".join(f"{count} {status}" for status, count in sorted(statuses.items())))
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
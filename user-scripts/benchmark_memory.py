@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+benchmark_memory.py - Misst den Spitzenspeicher (Peak RSS) beim Laden einer .sc Datei
+
+Jedes Verfahren läuft in einem eigenen Prozess, ausgegeben wird dessen höchster RSS:
+  read+split   Datei lesen, an b"START" teilen und dekomprimieren wie früher in load_internal
+  mmap         load_compressed, die Datei wird gemappt und ohne Kopien dekomprimiert
+  eager        SupercellSWF.load mit eager_textures, alle Texturen werden beim Laden dekodiert
+  lazy         SupercellSWF.load, Texturen werden erst beim ersten get_image() dekodiert
+  lazy+walk    wie lazy, danach wird jede Textur einzeln dekodiert und wieder freigegeben
+
+Nur unter Linux und macOS, dort gibt es das resource Modul.
+
+Verwendung: python user-scripts/benchmark_memory.py <datei.sc> [verfahren ...]
+"""
+
+import contextlib
+import io
+import os
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_DIR))
+
+MODES = ("read+split", "mmap", "eager", "lazy", "lazy+walk")
+
+
+def peak_rss() -> float:
+    """Höchster RSS des Prozesses in MB, ru_maxrss ist unter Linux in KB und unter macOS in Bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run(mode: str, path: str):
+    from sc_compression import Decompressor
+
+    from lib.sc import SupercellSWF
+    from lib.utils import BinaryReader, load_compressed
+
+    base = peak_rss()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == "read+split":
+            with open(path, "rb") as file:
+                compressed = file.read().split(b"START")[0]
+                reader = BinaryReader(Decompressor().decompress(compressed))
+
+        elif mode == "mmap":
+            reader = BinaryReader(load_compressed(path))
+
+        else:
+            swf = SupercellSWF()
+            swf.load(path, eager_textures=mode == "eager")
+
+            if mode == "lazy+walk":
+                for texture in swf.textures:
+                    texture.get_image()
+                    texture.release()
+
+    print(f"{base:.1f} {peak_rss():.1f}")
+
+
+def measure(mode: str, path: str) -> tuple:
+    output = subprocess.run([sys.executable, __file__, "--run", mode, path], capture_output=True, text=True, check=True).stdout
+    base, peak = map(float, output.split()[-2:])
+    return base, peak
+
+
+def main():
+    if len(sys.argv) >= 4 and sys.argv[1] == "--run":
+        run(sys.argv[2], sys.argv[3])
+        return
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    path = sys.argv[1]
+    modes = sys.argv[2:] or MODES
+
+    print(f"{os.path.basename(path)} ({os.path.getsize(path) / 1024 / 1024:.1f} MB)")
+    for mode in modes:
+        base, peak = measure(mode, path)
+        print(f"  {mode:10} Peak RSS {peak:8.1f} MB (+{peak - base:7.1f} MB nach den Imports)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+benchmark_pixels.py - Vergleicht das Dekodieren von SWFTexture Pixeln mit dem früheren Pixel-für-Pixel Leser
+
+Erzeugt für jedes Pixelformat zufällige Texturdaten, dekodiert sie einmal wie früher Pixel für Pixel
+über BinaryReader und PIL Pixelzugriff und einmal mit den NumPy Decodern aus PIXEL_DECODE_FUNCTIONS,
+jeweils linear und in 32x32 Kacheln, und gibt Laufzeiten und Abweichungen aus.
+
+Verwendung: python user-scripts/benchmark_pixels.py [breite] [höhe]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+PROJECT_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_DIR))
+
+from lib.sc.texture import MODES_TABLE, PIXEL_FORMATS, PIXEL_INTERNAL_FORMATS, PIXEL_SIZES, SWFTexture
+from lib.utils.reader import BinaryReader
+
+
+def read_rgba8(reader): return tuple(reader.read_uchar() for _ in range(4))
+
+def read_rgba4(reader):
+    p = reader.read_ushort()
+    return ((p >> 12) & 15) << 4, ((p >> 8) & 15) << 4, ((p >> 4) & 15) << 4, (p & 15) << 4
+
+def read_rgb5_a1(reader):
+    p = reader.read_ushort()
+    return ((p >> 11) & 31) << 3, ((p >> 6) & 31) << 3, ((p >> 1) & 31) << 3, (p & 255) << 7
+
+def read_rgb565(reader):
+    p = reader.read_ushort()
+    return ((p >> 11) & 31) << 3, ((p >> 5) & 63) << 2, (p & 31) << 3
+
+def read_luminance8_alpha8(reader): return reader.read_uchar(), reader.read_uchar()
+
+def read_luminance8(reader): return reader.read_uchar()
+
+PIXEL_READ_FUNCTIONS = {
+    "GL_RGBA8": read_rgba8,
+    "GL_RGBA4": read_rgba4,
+    "GL_RGB5_A1": read_rgb5_a1,
+    "GL_RGB565": read_rgb565,
+    "GL_LUMINANCE8_ALPHA8": read_luminance8_alpha8,
+    "GL_LUMINANCE8": read_luminance8
+}
+
+
+def decode_pixelwise(data: bytes, internal_format: str, mode: str, width: int, height: int, linear: bool) -> Image.Image:
+    """Der frühere Leser aus SWFTexture.load."""
+    reader = BinaryReader(data)
+    image = Image.new(mode, (width, height))
+    loaded = image.load()
+    read_pixel = PIXEL_READ_FUNCTIONS[internal_format]
+
+    if linear:
+        for y in range(height):
+            for x in range(width): loaded[x, y] = read_pixel(reader)
+    else:
+        block = 32
+        for yb in range((height // block) + 1):
+            for xb in range((width // block) + 1):
+                for y in range(block):
+                    py = yb * block + y
+                    if py >= height: break
+                    for x in range(block):
+                        px = xb * block + x
+                        if px >= width: break
+                        loaded[px, py] = read_pixel(reader)
+    return image
+
+
+def decode_numpy(data: bytes, internal_format: str, pixel_format: str, width: int, height: int, linear: bool) -> Image.Image:
+    texture = SWFTexture()
+    texture.pixel_internal_format = internal_format
+    texture.pixel_format = pixel_format
+    texture.width, texture.height = width, height
+    texture.linear = linear
+    texture.data = memoryview(data)
+    return texture.get_image()
+
+
+def measure(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 517
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 301
+
+    rng = np.random.default_rng(0)
+    print(f"{width}x{height} Pixel")
+
+    failed = False
+    for internal_format, pixel_format in dict(zip(PIXEL_INTERNAL_FORMATS, PIXEL_FORMATS)).items():
+        data = rng.integers(0, 256, width * height * PIXEL_SIZES[internal_format], np.uint8).tobytes()
+        mode = MODES_TABLE[pixel_format]
+
+        for linear in (True, False):
+            pixelwise_time, expected = measure(decode_pixelwise, data, internal_format, mode, width, height, linear)
+            numpy_time, decoded = measure(decode_numpy, data, internal_format, pixel_format, width, height, linear)
+
+            equal = expected.mode == decoded.mode and expected.tobytes() == decoded.tobytes()
+            failed |= not equal
+
+            print(f"  {internal_format:21} {'linear' if linear else 'gekachelt':9} pixelweise {pixelwise_time:7.3f} s, "
+                  f"NumPy {numpy_time:7.4f} s ({pixelwise_time / numpy_time:6.0f}x), {'gleich' if equal else 'ABWEICHEND'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+benchmark_textures.py - Vergleicht den eingebauten Textur-Decoder mit den externen Tools
+
+Dekodiert .ktx, .zktx und .sctx Dateien einmal direkt (ETC/ASTC mit NumPy) und einmal mit
+PVRTexToolCLI bzw. SctxConverter und gibt Laufzeiten und Abweichungen aus.
+
+Verwendung: python user-scripts/benchmark_textures.py <textur> [<textur> ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import zstandard
+from PIL import Image
+
+PROJECT_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_DIR))
+
+from lib.sc.streaming.ktx import KhronosTexture
+from lib.sc.streaming.sctx import SCTX
+from lib.tools import ToolExecutionError, ToolNotFoundError, run_pvr_tex_tool, run_sctx_converter
+
+
+def decode_builtin(path: str) -> Image.Image:
+    if path.endswith(".sctx"):
+        return SCTX(path).texture.decode()
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zktx"):
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return KhronosTexture(data).decode()
+
+
+def decode_external(path: str) -> Image.Image:
+    output = os.path.join(tempfile.gettempdir(), Path(path).stem + ".benchmark.png")
+
+    if path.endswith(".sctx"):
+        run_sctx_converter("decode", path, output, transparent=True)
+    else:
+        source = path
+        if path.endswith(".zktx"):
+            source = os.path.join(tempfile.gettempdir(), Path(path).stem + ".benchmark.ktx")
+            with open(path, "rb") as f, open(source, "wb") as out:
+                out.write(zstandard.ZstdDecompressor().decompress(f.read()))
+        run_pvr_tex_tool(source, output)
+
+    image = Image.open(output).convert("RGBA")
+    image.load()
+    os.remove(output)
+    return image
+
+
+def measure(function, path):
+    start = time.perf_counter()
+    image = function(path)
+    return image, time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        builtin, builtin_time = measure(decode_builtin, path)
+        print(f"{os.path.basename(path)}: {builtin.width}x{builtin.height}")
+        print(f"  Eingebaut: {builtin_time * 1000:8.1f} ms")
+
+        try:
+            external, external_time = measure(decode_external, path)
+        except (ToolNotFoundError, ToolExecutionError) as e:
+            print(f"  Extern:    nicht verfügbar ({e})")
+            continue
+
+        difference = np.abs(np.asarray(builtin, np.int16) - np.asarray(external, np.int16))
+        print(f"  Extern:    {external_time * 1000:8.1f} ms ({external_time / builtin_time:.1f}x)")
+        print(f"  Abweichung: max {difference.max()}, {np.count_nonzero(difference.any(axis=2))} Pixel")
+
+
+if __name__ == "__main__":
+    main()
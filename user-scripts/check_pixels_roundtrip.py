@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+check_pixels_roundtrip.py - Prüft SWFTexture.save gegen die früheren Pixel-für-Pixel Schreiber
+
+Speichert zufällige Bilder in jedem Pixelformat und mehreren Größen, linear und in 32x32 Kacheln,
+einmal mit SWFTexture.save und einmal wie früher Pixel für Pixel, und prüft, dass die Bytes gleich sind.
+Danach wird das Gespeicherte wieder dekodiert und erneut gespeichert, auch das muss bytegleich sein.
+GL_RGB5_A1 ist davon ausgenommen, das Alpha wird historisch aus (p & 255) << 7 gelesen und ist daher verlustbehaftet.
+GL_LUMINANCE8_ALPHA8 wird historisch als L << 8 | A geschrieben, aber als L, A gelesen, dort werden die Kanäle getauscht.
+
+Verwendung: python user-scripts/check_pixels_roundtrip.py
+"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+PROJECT_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_DIR))
+
+from lib.sc.texture import CHANNLES_TABLE, MODES_TABLE, PIXEL_FORMATS, PIXEL_INTERNAL_FORMATS, SWFTexture
+from lib.utils.writer import BinaryWriter
+
+SIZES = ((1, 1), (32, 32), (33, 65), (100, 37), (257, 130))
+
+LOSSY_ROUND_TRIP = ("GL_RGB5_A1",)
+
+
+def write_rgba8(writer, p): [writer.write_uchar(c) for c in p]
+
+def write_rgba4(writer, p): writer.write_ushort(p[3] >> 4 | p[2] >> 4 << 4 | p[1] >> 4 << 8 | p[0] >> 4 << 12)
+
+def write_rgb5_a1(writer, p): writer.write_ushort(p[3] >> 7 | p[2] >> 3 << 1 | p[1] >> 3 << 6 | p[0] >> 3 << 11)
+
+def write_rgb565(writer, p): writer.write_ushort(int(p[2] >> 3 | p[1] >> 2 << 5 | p[0] >> 3 << 11))
+
+def write_luminance8_alpha8(writer, p): writer.write_ushort(p[0] << 8 | p[1])
+
+def write_luminance8(writer, p): writer.write_uchar(int(p))
+
+PIXEL_WRITE_FUNCTIONS = {
+    "GL_RGBA8": write_rgba8,
+    "GL_RGBA4": write_rgba4,
+    "GL_RGB5_A1": write_rgb5_a1,
+    "GL_RGB565": write_rgb565,
+    "GL_LUMINANCE8_ALPHA8": write_luminance8_alpha8,
+    "GL_LUMINANCE8": write_luminance8
+}
+
+
+def encode_pixelwise(image: Image.Image, internal_format: str, linear: bool) -> bytes:
+    """Der frühere Pixelteil von SWFTexture.save."""
+    width, height = image.size
+    writer = BinaryWriter()
+    loaded = image.load()
+    write_pixel = PIXEL_WRITE_FUNCTIONS[internal_format]
+    if not linear:
+        clone = image.copy().load()
+        idx = 0
+        for yb in range((height // 32) + 1):
+            for xb in range((width // 32) + 1):
+                for y in range(32):
+                    py = yb * 32 + y
+                    if py >= height: break
+                    for x in range(32):
+                        px = xb * 32 + x
+                        if px >= width: break
+                        clone[idx % width, idx // width] = loaded[px, py]
+                        idx += 1
+        loaded = clone
+    for y in range(height):
+        for x in range(width): write_pixel(writer, loaded[x, y])
+    return writer.buffer
+
+
+def texture(internal_format: str, pixel_format: str, linear: bool) -> SWFTexture:
+    texture = SWFTexture()
+    texture.pixel_internal_format = internal_format
+    texture.pixel_format = pixel_format
+    texture.linear = linear
+    return texture
+
+
+def encode(image: Image.Image, internal_format: str, pixel_format: str, linear: bool) -> bytes:
+    """Pixeldaten von SWFTexture.save, ohne den Kopf aus Format, Breite und Höhe."""
+    encoder = texture(internal_format, pixel_format, linear)
+    encoder.set_pixels(np.array(image), image.mode)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, buffer = encoder.save(False)
+    return buffer[5:]
+
+
+def decode(data: bytes, internal_format: str, pixel_format: str, width: int, height: int, linear: bool) -> Image.Image:
+    decoder = texture(internal_format, pixel_format, linear)
+    decoder.width, decoder.height = width, height
+    decoder.data = memoryview(data)
+    return decoder.get_image()
+
+
+def main():
+    rng = np.random.default_rng(0)
+    cases = failures = 0
+    for internal_format, pixel_format in dict(zip(PIXEL_INTERNAL_FORMATS, PIXEL_FORMATS)).items():
+        mode = MODES_TABLE[pixel_format]
+        for width, height in SIZES:
+            pixels = rng.integers(0, 256, (height, width, CHANNLES_TABLE[mode]), np.uint8)
+            image = Image.fromarray(pixels[..., 0] if mode == "L" else pixels, mode)
+
+            for linear in (True, False):
+                cases += 1
+                errors = []
+
+                encoded = encode(image, internal_format, pixel_format, linear)
+                if encoded != encode_pixelwise(image, internal_format, linear):
+                    errors.append("weicht vom früheren Schreiber ab")
+
+                if internal_format not in LOSSY_ROUND_TRIP:
+                    decoded = decode(encoded, internal_format, pixel_format, width, height, linear)
+                    if internal_format == "GL_LUMINANCE8_ALPHA8":
+                        decoded = Image.merge("LA", decoded.split()[::-1])
+                    if encode(decoded, internal_format, pixel_format, linear) != encoded:
+                        errors.append("Round Trip nicht bytegleich")
+
+                if errors:
+                    failures += 1
+                    print(f"  {internal_format} {width}x{height} {'linear' if linear else 'gekachelt'}: {', '.join(errors)}")
+
+    print(f"{cases} Fälle, {failures} fehlerhaft")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+check_sprites.py - Vergleicht ShapeDrawBitmapCommand.get_image mit dem früheren Ausschneiden über die ganze Textur
+
+Zeichnet für zufällige konvexe uv Polygone und Rechtecke auf einer zufälligen RGBA Textur die Maske
+einmal wie früher über die ganze Textur und einmal über get_image, das nur im Begrenzungsrahmen
+arbeitet, und prüft, dass beide Sprites bytegleich sind.
+
+Verwendung: python user-scripts/check_sprites.py [polygone] [texturgröße]
+"""
+
+import random
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(PROJECT_DIR))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from lib.sc.shape import ShapeDrawBitmapCommand
+from lib.sc.texture import SWFTexture
+
+
+class TextureSWF:
+    def __init__(self, texture: SWFTexture):
+        self.textures = [texture]
+
+
+def get_image_full_texture(swf, bitmap: ShapeDrawBitmapCommand) -> Image:
+    """Das frühere get_image, die Maske wird über die ganze Textur gezeichnet."""
+    texture = swf.textures[bitmap.texture_index]
+    image = texture.get_image()
+    uv_coords = bitmap.uv_coords.tolist()
+
+    w, h = ShapeDrawBitmapCommand.get_size(uv_coords)
+    w, h = w or 1, h or 1
+
+    if w + h == 2:
+        return Image.new(image.mode, (1, 1), image.getpixel(tuple(uv_coords[0])))
+
+    mask = Image.new("L", (texture.width, texture.height), 0)
+    ImageDraw.Draw(mask).polygon([(x, y) for x, y in uv_coords], fill=255)
+
+    left = min(x for x, _ in uv_coords)
+    top = min(y for _, y in uv_coords)
+    bbox = left, top, left + w, top + h
+
+    sprite = Image.new(image.mode, (w, h))
+    sprite.paste(image.crop(bbox), (0, 0), mask.crop(bbox))
+    return sprite
+
+
+def convex_hull(points: list) -> list:
+    points = sorted(set(points))
+
+    def half(points):
+        hull = []
+        for point in points:
+            while len(hull) >= 2 and ((hull[-1][0] - hull[-2][0]) * (point[1] - hull[-2][1]) -
+                                      (hull[-1][1] - hull[-2][1]) * (point[0] - hull[-2][0])) <= 0:
+                hull.pop()
+            hull.append(point)
+        return hull
+
+    return half(points)[:-1] + half(points[::-1])[:-1]
+
+
+def random_polygon(rng: random.Random, size: int) -> list:
+    x, y = rng.randrange(size - 64), rng.randrange(size - 64)
+    if rng.random() < 0.25:
+        w, h = rng.randint(1, 63), rng.randint(1, 63)
+        return [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+
+    extent = rng.choice((4, 16, 64))
+    return convex_hull([(x + rng.randrange(extent), y + rng.randrange(extent)) for _ in range(rng.randint(3, 8))])
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1500
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 2048
+
+    texture = SWFTexture()
+    texture.set_pixels(np.random.default_rng(0).integers(0, 256, (size, size, 4), np.uint8), "RGBA")
+    swf = TextureSWF(texture)
+
+    rng = random.Random(0)
+    checked = mismatches = 0
+    while checked < count:
+        polygon = random_polygon(rng, size)
+        if len(polygon) < 3:
+            continue
+
+        bitmap = ShapeDrawBitmapCommand()
+        bitmap.texture_index = 0
+        bitmap.uv_coords = np.array(polygon, np.int32)
+
+        if get_image_full_texture(swf, bitmap).tobytes() != bitmap.get_image(swf).tobytes():
+            mismatches += 1
+            print(f"  Abweichung: {polygon}")
+        checked += 1
+
+    print(f"{checked} Polygone auf {size}x{size}: {mismatches} Abweichungen")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()